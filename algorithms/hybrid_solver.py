@@ -8,6 +8,7 @@ from typing import Optional, List, Tuple, Dict
 from core.data_structures import Customer, Solution
 from algorithms.mih import limited_candidate_mih
 from algorithms.mds import selective_mds
+from operators.lns_destroy_repair import REGRET_K
 
 
 # Configuration
@@ -25,7 +26,10 @@ def solve_vrptw(
     min_candidates: int = MIN_CANDIDATES,
     max_mds_iterations: int = MAX_MDS_ITERATIONS,
     top_n_critical: int = TOP_N_CRITICAL_ROUTES,
-    random_seed: Optional[int] = None
+    random_seed: Optional[int] = None,
+    neighbor_count: Optional[int] = None,
+    repair: str = "first_fit",
+    regret_k: int = REGRET_K
 ) -> Solution:
     """
     Solve VRPTW using MIH-MDS hybrid algorithm
@@ -48,29 +52,29 @@ def solve_vrptw(
         max_mds_iterations: Maximum MDS improvement iterations
         top_n_critical: Number of critical routes to improve per MDS iteration
         random_seed: Random seed for reproducibility
+        neighbor_count: Granular inter-route search - only try routes
+            serving one of each customer's k nearest customers (None = all)
+        repair: LNS repair strategy - "first_fit", "best" or "regret"
+        regret_k: k for repair="regret" (regret over the k best routes)
     
     Returns:
         Solution object (feasible VRPTW solution)
     """
-    # Phase 1: Limited Candidate MIH
-    # Generates fast, feasible, but improvable solution
-    solution = limited_candidate_mih(
+    # Same two-phase pipeline as solve_vrptw_with_stats; kept as one
+    # implementation so the phases can't drift apart
+    solution, _ = solve_vrptw_with_stats(
         depot=depot,
         customers=customers,
         vehicle_capacity=vehicle_capacity,
         candidate_ratio=candidate_ratio,
         min_candidates=min_candidates,
-        random_seed=random_seed
-    )
-    
-    # Phase 2: Selective MDS
-    # Improves critical routes using in-place operators
-    solution = selective_mds(
-        solution=solution,
-        max_iterations=max_mds_iterations,
-        top_n_critical=top_n_critical
+        max_mds_iterations=max_mds_iterations,
+        top_n_critical=top_n_critical,
+        random_seed=random_seed,
+        neighbor_count=neighbor_count,
+        repair=repair,
+        regret_k=regret_k
     )
-    
     return solution
 
 
@@ -112,7 +116,10 @@ def solve_vrptw_with_stats(
     solution = selective_mds(
         solution=solution,
         max_iterations=kwargs.get('max_mds_iterations', MAX_MDS_ITERATIONS),
-        top_n_critical=kwargs.get('top_n_critical', TOP_N_CRITICAL_ROUTES)
+        top_n_critical=kwargs.get('top_n_critical', TOP_N_CRITICAL_ROUTES),
+        neighbor_count=kwargs.get('neighbor_count', None),
+        repair=kwargs.get('repair', "first_fit"),
+        regret_k=kwargs.get('regret_k', REGRET_K)
     )
     mds_time = time.time() - start_time
     final_cost = solution.total_cost
@@ -3,8 +3,9 @@ Selective Multi-Directional Search (MDS)
 Now includes INTER-ROUTE vehicle reduction
 """
 
-from typing import List
+from typing import List, Optional
 from core.data_structures import Solution, Route
+from core.geometry import build_neighbor_lists
 from evaluation.route_analyzer import identify_critical_route_indices
 from operators.inter_route_relocate import inter_route_relocate_inplace
 from operators.intra_route_2opt import intra_route_2opt_inplace
@@ -12,7 +13,7 @@ from operators.or_opt import or_opt_inplace
 from operators.temporal_shift import temporal_shift_operator_inplace
 from operators.swap import swap_operator_inplace
 from operators.relocate import relocate_operator_inplace
-from operators.lns_destroy_repair import lns_destroy_repair
+from operators.lns_destroy_repair import REGRET_K, lns_destroy_repair
 
 
 MAX_MDS_ITERATIONS = 50
@@ -24,7 +25,10 @@ EARLY_TERMINATION_THRESHOLD = 10
 def selective_mds(solution: Solution,
                   max_iterations: int = MAX_MDS_ITERATIONS,
                   top_n_critical: int = TOP_N_CRITICAL_ROUTES,
-                  early_termination: int = EARLY_TERMINATION_THRESHOLD) -> Solution:
+                  early_termination: int = EARLY_TERMINATION_THRESHOLD,
+                  neighbor_count: Optional[int] = None,
+                  repair: str = "first_fit",
+                  regret_k: int = REGRET_K) -> Solution:
     """
     Two-phase MDS:
       Phase 1 (feasibility / vehicle reduction):
@@ -32,6 +36,13 @@ def selective_mds(solution: Solution,
           guided by the penalised objective in Solution.update_cost().
       Phase 2 (cost refinement):
         - focuses on temporal shift, swap and relocate on critical routes.
+
+    neighbor_count switches phase 1 to granular inter-route relocate
+    (see inter_route_relocate_inplace); the neighbor lists are built once
+    here and shared by every call.
+
+    repair (and regret_k for repair="regret") select the repair strategy
+    of the LNS escape between the phases (see lns_destroy_repair).
     """
 
     max_route_size = max((len(r.customer_ids) for r in solution.routes), default=0)
@@ -41,12 +52,25 @@ def selective_mds(solution: Solution,
     iteration = 0
     no_improvement = 0
 
+    # Per-route summaries for inter-route relocate, validated against the
+    # route state on every lookup (each accepted move changes two routes)
+    relocate_cache = {}
+    neighbors = None
+    if neighbor_count is not None and solution.routes:
+        neighbors = build_neighbor_lists(
+            solution.routes[0].dist_matrix,
+            [cid for r in solution.routes for cid in r.customer_ids],
+            neighbor_count)
+
     # --- Phase 1: feasibility / vehicle-count focused ---
     while iteration < max_iterations and no_improvement < early_termination:
         iteration += 1
         improved = False
 
-        if inter_route_relocate_inplace(solution, temp_arrival_buffer):
+        if inter_route_relocate_inplace(solution, temp_arrival_buffer,
+                                        neighbor_count=neighbor_count,
+                                        route_cache=relocate_cache,
+                                        neighbors=neighbors):
             improved = True
 
         if improved:
@@ -61,50 +85,67 @@ def selective_mds(solution: Solution,
     solution.update_cost()
 
     # --- Global escape: one lightweight LNS destroy-repair before refinement ---
-    if lns_destroy_repair(solution, removal_fraction=0.15, fixed_remove_count=12, random_seed=42):
-        solution.update_cost()
+    # (it refreshes the solution cost itself)
+    lns_destroy_repair(solution, removal_fraction=0.15, fixed_remove_count=12, random_seed=42,
+                       repair=repair, regret_k=regret_k)
 
     # --- Phase 2: route-level cost refinement ---
+    # Only intra-route operators run here, so the route set is fixed and
+    # criticality scores stay valid until their route is modified. Operators
+    # keep their own route cost current; the penalised solution cost is
+    # only needed once, after the loop
+    score_cache = {}
+    # All phase-2 operators are deterministic in the route state, so once
+    # they have all failed on a route they will fail again until it changes;
+    # remember that state (canonical id sequence + departure) and skip it
+    exhausted = {}
     no_improvement = 0
     while iteration < max_iterations and no_improvement < early_termination:
         iteration += 1
         improved = False
 
         critical_indices = identify_critical_route_indices(
-            solution, top_n=min(top_n_critical, len(solution.routes))
+            solution, top_n=min(top_n_critical, len(solution.routes)),
+            score_cache=score_cache
         )
 
         for route_idx in critical_indices:
             route = solution.routes[route_idx]
+            state = (tuple(route.customer_ids), route.departure_time)
+            if exhausted.get(id(route)) == state:
+                continue
 
             # 0. Intra-route 2-opt (polish ordering under time windows)
             if intra_route_2opt_inplace(route):
-                solution.update_cost()
+                score_cache.pop(id(route), None)
                 improved = True
                 continue
 
             # 0.5. Or-Opt (1-3 segment relocate) for finer path cleanup
             if or_opt_inplace(route, max_segment_len=3):
-                solution.update_cost()
+                score_cache.pop(id(route), None)
                 improved = True
                 continue
 
             # 1. Temporal shift
             if temporal_shift_operator_inplace(route, temp_arrival_buffer):
-                solution.update_cost()
+                score_cache.pop(id(route), None)
                 improved = True
                 continue
 
             # 2. Swap
             if swap_operator_inplace(route, temp_arrival_buffer, max_swaps=20):
-                solution.update_cost()
+                score_cache.pop(id(route), None)
                 improved = True
                 continue
 
             # 3. Intra-route relocate
             if relocate_operator_inplace(route, temp_arrival_buffer, max_relocations=20):
-                solution.update_cost()
+                score_cache.pop(id(route), None)
                 improved = True
+                continue
+
+            exhausted[id(route)] = state
 
         if improved:
             no_improvement = 0
@@ -5,7 +5,8 @@ Designed to leave structured improvement potential for MDS
 
 import random
 from typing import List, Dict, Optional, Tuple
-from core.data_structures import Customer, Route, Solution, distance
+from core.data_structures import Customer, Route, Solution, build_customer_arrays
+from core.geometry import build_distance_matrix, scale_distance_matrix
 
 
 def limited_candidate_mih(
@@ -17,12 +18,31 @@ def limited_candidate_mih(
     random_seed: Optional[int] = None
 ) -> Solution:
 
-    if random_seed is not None:
-        random.seed(random_seed)
+    # Seeded runs draw from their own generator instead of reseeding the
+    # shared module state; unseeded runs keep using the global one
+    rng = random.Random(random_seed) if random_seed is not None else random
 
     customers_lookup: Dict[int, Customer] = {c.id: c for c in customers}
+
+    # Distance matrices and customer arrays built once and shared by every route
+    dist_matrix = build_distance_matrix(depot, customers)
+    scaled_dist_matrix = scale_distance_matrix(dist_matrix)
+    customer_arrays = build_customer_arrays(depot, customers)
+    depot_id = depot.id
     unrouted_ids: List[int] = [c.id for c in customers]
-    random.shuffle(unrouted_ids)  # weaken/perturb initial order
+    rng.shuffle(unrouted_ids)  # weaken/perturb initial order
+
+    # Opening a new route costs the same every time for a given customer
+    # (it only depends on the depot legs); price it once up front and only
+    # build the Route object when a new route actually wins
+    empty_route = Route(depot, vehicle_capacity, customers_lookup,
+                        dist_matrix, scaled_dist_matrix, customer_arrays)
+    new_route_cost: Dict[int, float] = {
+        c.id: calculate_insertion_cost_inline(empty_route, c, 0) for c in customers
+    }
+    # Successor ids and arc lengths per route, shared by every sampled
+    # customer; only the route that receives a customer refreshes its entry
+    route_geometry: Dict[int, Tuple[List[int], List[float]]] = {}
 
     solution = Solution()
 
@@ -32,13 +52,15 @@ def limited_candidate_mih(
     while unrouted_ids:
         # Ensure at least one route exists
         if not routes:
-            routes.append(Route(depot, vehicle_capacity, customers_lookup))
+            routes.append(Route(depot, vehicle_capacity, customers_lookup,
+                                dist_matrix, scaled_dist_matrix, customer_arrays))
 
         # -------------------------------
         # REGRET-2 SELECTION
         # -------------------------------
+        # best route None = open a new route
         best_choice: Optional[
-            Tuple[float, float, int, Route, int]
+            Tuple[float, float, int, Optional[Route], int]
         ] = None
 
         num_candidates = max(
@@ -46,13 +68,17 @@ def limited_candidate_mih(
             int(len(unrouted_ids) * candidate_ratio)
         )
 
-        sampled_ids = random.sample(
+        sampled_ids = rng.sample(
             unrouted_ids,
             min(num_candidates, len(unrouted_ids))
         )
 
         for customer_id in sampled_ids:
             customer = customers_lookup[customer_id]
+            # Position-independent part of calculate_insertion_cost_inline
+            penalty = time_window_penalty(customer)
+            demand = customer.demand
+            row = dist_matrix[customer_id]
 
             best = float('inf')
             second_best = float('inf')
@@ -60,8 +86,33 @@ def limited_candidate_mih(
             best_position = None
 
             for route in routes:
-                for pos in range(len(route.customer_ids) + 1):
-                    cost = calculate_insertion_cost_inline(route, customer, pos)
+                if not route.customer_ids:
+                    cost = calculate_insertion_cost_inline(route, customer, 0)
+                    if cost < best:
+                        second_best = best
+                        best = cost
+                        best_route = route
+                        best_position = 0
+                    elif cost < second_best:
+                        second_best = cost
+                    continue
+
+                # Capacity is position independent: a full route is inf
+                # everywhere and can never become best/second best
+                if route.current_load + demand > route.vehicle_capacity:
+                    continue
+                geometry = route_geometry.get(id(route))
+                if geometry is None:
+                    geometry = route_geometry[id(route)] = (
+                        route.customer_ids + [depot_id], route.get_arc_lengths())
+                successors, arcs = geometry
+
+                # Same value as calculate_insertion_cost_inline at each
+                # position, with the route-level terms read from the cache
+                prev_id = depot_id
+                for pos, next_id in enumerate(successors):
+                    cost = row[prev_id] + row[next_id] - arcs[pos] + penalty - 3.0
+                    prev_id = next_id
 
                     if cost < best:
                         second_best = best
@@ -72,13 +123,12 @@ def limited_candidate_mih(
                         second_best = cost
 
             # Also consider opening a NEW route (penalized)
-            new_route = Route(depot, vehicle_capacity, customers_lookup)
-            cost_new = calculate_insertion_cost_inline(new_route, customer, 0)
+            cost_new = new_route_cost[customer_id]
 
             if cost_new < best:
                 second_best = best
                 best = cost_new
-                best_route = new_route
+                best_route = None
                 best_position = 0
 
             regret = second_best - best
@@ -94,23 +144,28 @@ def limited_candidate_mih(
         if best_choice is None:
             # Forced new route fallback
             cid = unrouted_ids.pop(0)
-            r = Route(depot, vehicle_capacity, customers_lookup)
+            r = Route(depot, vehicle_capacity, customers_lookup,
+                      dist_matrix, scaled_dist_matrix, customer_arrays)
             r.insert_inplace(cid, 0)
             routes.append(r)
             continue
 
         _, _, customer_id, route, position = best_choice
 
-        # If route is new, register it
-        if route not in routes:
+        # If route is new, create and register it
+        if route is None:
+            route = Route(depot, vehicle_capacity, customers_lookup,
+                          dist_matrix, scaled_dist_matrix, customer_arrays)
             routes.append(route)
 
         inserted = route.insert_inplace(customer_id, position)
+        route_geometry.pop(id(route), None)
         if inserted:
             unrouted_ids.remove(customer_id)
         else:
             # Fallback: open new route
-            fallback = Route(depot, vehicle_capacity, customers_lookup)
+            fallback = Route(depot, vehicle_capacity, customers_lookup,
+                             dist_matrix, scaled_dist_matrix, customer_arrays)
             fallback.insert_inplace(customer_id, 0)
             routes.append(fallback)
             unrouted_ids.remove(customer_id)
@@ -139,49 +194,38 @@ def calculate_insertion_cost_inline(route: Route, customer: Customer, position:
         return float('inf')
 
     additional_distance = 0.0
+    ids = route.customer_ids
+    dm = route.dist_matrix
+    depot_id = route.depot.id
+    cid = customer.id
 
-    if len(route.customer_ids) == 0:
-        additional_distance = (
-            distance(route.depot, customer) +
-            distance(customer, route.depot)
-        )
+    if len(ids) == 0:
+        additional_distance = dm[depot_id][cid] + dm[cid][depot_id]
         # Penalize new vehicle
         additional_distance += 60.0
 
-    elif position == 0:
-        first = route.get_customer(0)
-        additional_distance = (
-            distance(route.depot, customer) +
-            distance(customer, first) -
-            distance(route.depot, first)
-        )
-
-    elif position == len(route.customer_ids):
-        last = route.get_customer(-1)
-        additional_distance = (
-            distance(last, customer) +
-            distance(customer, route.depot) -
-            distance(last, route.depot)
-        )
-
     else:
-        prev = route.get_customer(position - 1)
-        nxt = route.get_customer(position)
-        additional_distance = (
-            distance(prev, customer) +
-            distance(customer, nxt) -
-            distance(prev, nxt)
-        )
+        prev_id = ids[position - 1] if position > 0 else depot_id
+        next_id = ids[position] if position < len(ids) else depot_id
+        additional_distance = dm[prev_id][cid] + dm[cid][next_id] - dm[prev_id][next_id]
 
     # Time-window tightness penalty
-    tw_width = customer.due_date - customer.ready_time
-    if tw_width < 20:
-        additional_distance += 10.0
-    elif tw_width < 40:
-        additional_distance += 4.0
+    additional_distance += time_window_penalty(customer)
 
     # Prefer consolidating routes
     if len(route.customer_ids) > 0:
         additional_distance -= 3.0
 
     return additional_distance
+
+
+def time_window_penalty(customer: Customer) -> float:
+    """
+    Extra insertion cost for tight time windows (position independent)
+    """
+    tw_width = customer.due_date - customer.ready_time
+    if tw_width < 20:
+        return 10.0
+    elif tw_width < 40:
+        return 4.0
+    return 0.0
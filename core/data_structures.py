@@ -5,7 +5,7 @@ CRITICAL: Minimize space complexity, use __slots__, in-place operations
 
 from dataclasses import dataclass
 import math
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 
 @dataclass
@@ -24,6 +24,34 @@ class Customer:
         pass
 
 
+@dataclass
+class CustomerArrays:
+    """
+    Customer fields as flat lists indexed by customer id (depot included)
+    Built once per instance and shared by every route, like the distance
+    matrices - hot loops index these instead of chasing Customer objects
+    """
+    demand: List[int]
+    ready_time: List[int]
+    due_date: List[int]
+    service_time: List[int]
+
+
+def build_customer_arrays(depot: Customer, customers: Iterable[Customer]) -> CustomerArrays:
+    """Gather per-customer fields into id-indexed lists - O(n), once per instance"""
+    nodes = [depot]
+    nodes.extend(customers)
+    size = max(c.id for c in nodes) + 1
+
+    arrays = CustomerArrays([0] * size, [0] * size, [0] * size, [0] * size)
+    for c in nodes:
+        arrays.demand[c.id] = c.demand
+        arrays.ready_time[c.id] = c.ready_time
+        arrays.due_date[c.id] = c.due_date
+        arrays.service_time[c.id] = c.service_time
+    return arrays
+
+
 def distance(c1: Customer, c2: Customer) -> float:
     """
     Calculate Euclidean distance on-the-fly
@@ -39,9 +67,13 @@ class Route:
     """
     __slots__ = ['customer_ids', 'arrival_times', 'departure_time', 
                  'current_load', 'total_cost', 'depot', 'customers_lookup', 
-                 'vehicle_capacity']
+                 'vehicle_capacity', 'dist_matrix', 'scaled_dist_matrix',
+                 'customer_arrays']
     
-    def __init__(self, depot: Customer, vehicle_capacity: int, customers_lookup: Dict[int, Customer]):
+    def __init__(self, depot: Customer, vehicle_capacity: int, customers_lookup: Dict[int, Customer],
+                 dist_matrix: List[List[float]],
+                 scaled_dist_matrix: List[List[int]],
+                 customer_arrays: CustomerArrays):
         self.customer_ids: List[int] = []        # List of IDs (not Customer objects)
         self.arrival_times: List[float] = []     # Parallel array
         self.departure_time: float = 0.0
@@ -51,28 +83,35 @@ class Route:
         self.customers_lookup: Dict[int, Customer] = customers_lookup  # Reference to global dict
         self.vehicle_capacity: int = vehicle_capacity
 
+        # Shared instance-wide structures, built once per instance by the
+        # caller (building is O(n^2)) and held by reference on every route
+        self.dist_matrix: List[List[float]] = dist_matrix
+        self.scaled_dist_matrix: List[List[int]] = scaled_dist_matrix
+        self.customer_arrays: CustomerArrays = customer_arrays
+
     def recompute_schedule(self):
         """
         Recompute arrival times after route modification.
         Compatible with current Route structure.
+        Thin wrapper over _recalculate_from(0) - one schedule implementation.
         """
+        if len(self.arrival_times) != len(self.customer_ids):
+            self.arrival_times = [0.0] * len(self.customer_ids)
+        self._recalculate_from(0)
 
-        self.arrival_times.clear()
-
-        time = self.departure_time
-        prev = self.depot
-
-        for cust_id in self.customer_ids:
-            customer = self.customers_lookup[cust_id]
-
-            travel = distance(prev, customer)
-            arrival = max(time + travel, customer.ready_time)
-
-            self.arrival_times.append(arrival)
+    def savepoint(self) -> tuple:
+        """
+        Cheap snapshot for trial moves: references to the current lists
+        plus the cached load and cost - nothing is copied. Valid only if
+        the trial assigns fresh lists instead of mutating these in place
+        """
+        return (self.customer_ids, self.arrival_times,
+                self.current_load, self.total_cost)
 
-            # departure = arrival + service_time
-            time = arrival + customer.service_time
-            prev = customer
+    def restore(self, savepoint: tuple):
+        """Roll back to a savepoint() by reference reassignment - O(1)"""
+        (self.customer_ids, self.arrival_times,
+         self.current_load, self.total_cost) = savepoint
 
     
     def get_customer(self, idx: int) -> Customer:
@@ -92,28 +131,23 @@ class Route:
         Insert customer and update only affected portion
         Returns True if insertion was successful and feasible
         """
-        customer = self.customers_lookup[customer_id]
+        demand = self.customer_arrays.demand[customer_id]
         
         # Check capacity constraint
-        if self.current_load + customer.demand > self.vehicle_capacity:
+        if self.current_load + demand > self.vehicle_capacity:
             return False
         
         self.customer_ids.insert(position, customer_id)
-        self.arrival_times.insert(position, 0.0)
-        self.current_load += customer.demand
-        
-        # Recalculate from position onwards
-        self._recalculate_from(position)
-        
-        # Check feasibility after insertion
-        if not self.is_feasible():
-            # Rollback
-            self.customer_ids.pop(position)
-            self.arrival_times.pop(position)
-            self.current_load -= customer.demand
-            self._recalculate_from(position)
+        
+        # Validate from position onwards without touching the schedule
+        # (the prefix is unchanged and was feasible)
+        if self.evaluate_suffix(position) is None:
+            # Rollback - only the id list was modified
+            del self.customer_ids[position]
             return False
         
+        # One sweep rebuilds arrivals (resized) and cost
+        self.current_load += demand
         self.calculate_cost_inplace()
         return True
     
@@ -125,31 +159,151 @@ class Route:
         if len(self.customer_ids) == 0:
             return
         
+        ids = self.customer_ids
+        dm = self.dist_matrix
+        ready = self.customer_arrays.ready_time
+        service = self.customer_arrays.service_time
+        arrival_times = self.arrival_times
+        
         # Start from depot or from previous customer
         if start_idx == 0:
             current_time = self.departure_time
-            prev_location = self.depot
+            prev_id = self.depot.id
         else:
-            prev_customer = self.get_customer(start_idx - 1)
-            current_time = self.arrival_times[start_idx - 1] + prev_customer.service_time
-            prev_location = prev_customer
+            prev_id = ids[start_idx - 1]
+            current_time = arrival_times[start_idx - 1] + service[prev_id]
         
         # Recalculate for all customers from start_idx
-        for i in range(start_idx, len(self.customer_ids)):
-            customer = self.get_customer(i)
+        for i in range(start_idx, len(ids)):
+            cust_id = ids[i]
             
             # Travel time from previous location
-            travel_time = distance(prev_location, customer)
+            travel_time = dm[prev_id][cust_id]
             arrival_time = current_time + travel_time
             
             # Apply time window constraint (wait if early)
-            arrival_time = max(arrival_time, customer.ready_time)
+            ready_time = ready[cust_id]
+            if arrival_time < ready_time:
+                arrival_time = ready_time
             
-            self.arrival_times[i] = arrival_time
+            arrival_times[i] = arrival_time
             
             # Update for next iteration
-            current_time = arrival_time + customer.service_time
-            prev_location = customer
+            current_time = arrival_time + service[cust_id]
+            prev_id = cust_id
+    
+    def evaluate_suffix(self, start_idx: int, settle_from: Optional[int] = None,
+                        wait_prefix: Optional[List[float]] = None) -> Optional[float]:
+        """
+        Validate a tentative edit of customer_ids[start_idx:] without
+        touching route state. Times are re-propagated from the stored
+        arrival at start_idx - 1, which the edit must not have changed.
+        
+        settle_from (with wait_prefix from get_waiting_prefix) marks where
+        the edit leaves every stop in place: from there on, the first stop
+        reached at its stored arrival time settles the rest of the route,
+        whose waiting is read off the prefix instead of re-propagated
+        
+        Returns waiting accumulated from start_idx onwards, or None as soon
+        as a time window is violated
+        """
+        ids = self.customer_ids
+        dm = self.dist_matrix
+        arrays = self.customer_arrays
+        ready = arrays.ready_time
+        due = arrays.due_date
+        service = arrays.service_time
+        n = len(ids)
+        if settle_from is None or settle_from > n:
+            settle_from = n
+        
+        if start_idx == 0:
+            time = self.departure_time
+            prev_id = self.depot.id
+        else:
+            prev_id = ids[start_idx - 1]
+            time = self.arrival_times[start_idx - 1] + service[prev_id]
+        
+        waiting = 0.0
+        for i in range(start_idx, settle_from):
+            cust_id = ids[i]
+            arrival = time + dm[prev_id][cust_id]
+            ready_time = ready[cust_id]
+            if arrival < ready_time:
+                waiting += ready_time - arrival
+                arrival = ready_time
+            if arrival > due[cust_id]:
+                return None
+            time = arrival + service[cust_id]
+            prev_id = cust_id
+        
+        stored = self.arrival_times
+        for i in range(max(start_idx, settle_from), n):
+            cust_id = ids[i]
+            arrival = time + dm[prev_id][cust_id]
+            ready_time = ready[cust_id]
+            if arrival < ready_time:
+                waiting += ready_time - arrival
+                arrival = ready_time
+            if arrival == stored[i]:
+                # Same stop, same arrival: the stored (feasible) schedule
+                # holds from here to the end
+                return waiting + (wait_prefix[-1] - wait_prefix[i + 1])
+            if arrival > due[cust_id]:
+                return None
+            time = arrival + service[cust_id]
+            prev_id = cust_id
+        
+        return waiting
+    
+    def evaluate_insertion(self, customer_id: int, position: int) -> Optional[float]:
+        """
+        evaluate_suffix(position) for customer_id inserted at position,
+        without inserting it: customer_ids and the schedule are untouched.
+        Waiting is summed in the same order, so results match exactly
+        
+        Returns waiting from position onwards (new stop included), or None
+        if a time window is violated
+        """
+        ids = self.customer_ids
+        dm = self.dist_matrix
+        arrays = self.customer_arrays
+        ready = arrays.ready_time
+        due = arrays.due_date
+        service = arrays.service_time
+        stored = self.arrival_times
+        
+        if position == 0:
+            time = self.departure_time
+            prev_id = self.depot.id
+        else:
+            prev_id = ids[position - 1]
+            time = stored[position - 1] + service[prev_id]
+        
+        waiting = 0.0
+        arrival = time + dm[prev_id][customer_id]
+        ready_time = ready[customer_id]
+        if arrival < ready_time:
+            waiting += ready_time - arrival
+            arrival = ready_time
+        if arrival > due[customer_id]:
+            return None
+        time = arrival + service[customer_id]
+        prev_id = customer_id
+        
+        for i in range(position, len(ids)):
+            cust_id = ids[i]
+            arrival = time + dm[prev_id][cust_id]
+            ready_time = ready[cust_id]
+            if arrival < ready_time:
+                waiting += ready_time - arrival
+                arrival = ready_time
+            if arrival > due[cust_id]:
+                return None
+            time = arrival + service[cust_id]
+            prev_id = cust_id
+        
+        return waiting
     
     def is_feasible(self) -> bool:
         """Check feasibility without creating temporary data"""
@@ -161,11 +315,9 @@ class Route:
             return False
         
         # Check time windows
-        for i, customer_id in enumerate(self.customer_ids):
-            customer = self.customers_lookup[customer_id]
-            arrival = self.arrival_times[i]
-            
-            if arrival > customer.due_date:
+        due = self.customer_arrays.due_date
+        for customer_id, arrival in zip(self.customer_ids, self.arrival_times):
+            if arrival > due[customer_id]:
                 return False
         
         return True
@@ -188,30 +340,33 @@ class Route:
         if len(self.arrival_times) != n:
             self.arrival_times = [0.0] * n
 
+        dm = self.dist_matrix
+        ready = self.customer_arrays.ready_time
+        service = self.customer_arrays.service_time
+        arrival_times = self.arrival_times
         time = self.departure_time
-        prev = self.depot
+        prev_id = self.depot.id
 
         for i, cust_id in enumerate(self.customer_ids):
-            customer = self.customers_lookup[cust_id]
-
-            travel = distance(prev, customer)
+            travel = dm[prev_id][cust_id]
             raw_arrival = time + travel
-            wait = max(0.0, customer.ready_time - raw_arrival)
+            wait = ready[cust_id] - raw_arrival
+            if wait < 0.0:
+                wait = 0.0
             arrival = raw_arrival + wait
 
             # store final arrival (after waiting) for feasibility / slack logic
-            self.arrival_times[i] = arrival
+            arrival_times[i] = arrival
 
             # distance + waiting contribute to cost
             total_cost += travel + wait
 
             # next leg starts after service
-            time = arrival + customer.service_time
-            prev = customer
+            time = arrival + service[cust_id]
+            prev_id = cust_id
 
         # Return to depot
-        last_customer = self.customers_lookup[self.customer_ids[-1]]
-        total_cost += distance(last_customer, self.depot)
+        total_cost += dm[prev_id][self.depot.id]
 
         self.total_cost = total_cost
         return total_cost
@@ -225,24 +380,93 @@ class Route:
         if not self.customer_ids:
             return 0.0
 
-        total_dist = 0.0
+        ids = self.customer_ids
+        dm = self.dist_matrix
+        depot_id = self.depot.id
 
         # depot -> first
-        first = self.customers_lookup[self.customer_ids[0]]
-        total_dist += distance(self.depot, first)
+        total_dist = 0.0
+        total_dist += dm[depot_id][ids[0]]
 
         # between customers
-        for i in range(len(self.customer_ids) - 1):
-            c1 = self.customers_lookup[self.customer_ids[i]]
-            c2 = self.customers_lookup[self.customer_ids[i + 1]]
-            total_dist += distance(c1, c2)
+        for i in range(len(ids) - 1):
+            total_dist += dm[ids[i]][ids[i + 1]]
 
         # last -> depot
-        last = self.customers_lookup[self.customer_ids[-1]]
-        total_dist += distance(last, self.depot)
+        total_dist += dm[ids[-1]][depot_id]
 
         return total_dist
     
+    def get_swap_distance_delta(self, i: int, j: int) -> float:
+        """
+        Change in travel distance if customers at positions i and j were swapped
+        Reads only the touched edges from dist_matrix - route is not modified
+        """
+        if i > j:
+            i, j = j, i
+        ids = self.customer_ids
+        dm = self.dist_matrix
+        depot_id = self.depot.id
+        last = len(ids) - 1
+
+        a = ids[i - 1] if i > 0 else depot_id
+        b = ids[i]
+        e = ids[j]
+        f = ids[j + 1] if j < last else depot_id
+
+        if j == i + 1:
+            # Adjacent: a-b-e-f becomes a-e-b-f (b-e edge is kept)
+            return dm[a][e] + dm[b][f] - dm[a][b] - dm[e][f]
+
+        c = ids[i + 1]
+        d = ids[j - 1]
+        return (dm[a][e] + dm[e][c] + dm[d][b] + dm[b][f]
+                - dm[a][b] - dm[b][c] - dm[d][e] - dm[e][f])
+    
+    def get_removal_distance_delta(self, pos: int) -> float:
+        """
+        Change in travel distance if the customer at pos were removed
+        (dm[pred][succ] - dm[pred][c] - dm[c][succ]) - route is not modified
+        """
+        ids = self.customer_ids
+        dm = self.dist_matrix
+        depot_id = self.depot.id
+        cust_id = ids[pos]
+        prev_id = ids[pos - 1] if pos > 0 else depot_id
+        next_id = ids[pos + 1] if pos + 1 < len(ids) else depot_id
+        return dm[prev_id][next_id] - dm[prev_id][cust_id] - dm[cust_id][next_id]
+    
+    def get_arc_lengths(self) -> List[float]:
+        """
+        Length of every arc depot -> c1 -> ... -> cn -> depot (n + 1 entries)
+        Route geometry for insertion pricing - valid until customer_ids changes
+        """
+        dm = self.dist_matrix
+        depot_id = self.depot.id
+        stops = [depot_id] + self.customer_ids + [depot_id]
+        return [dm[stops[p]][stops[p + 1]] for p in range(len(stops) - 1)]
+    
+    def get_insertion_distance_deltas(self, customer_id: int,
+                                      arc_lengths: Optional[List[float]] = None) -> List[float]:
+        """
+        Change in travel distance for inserting customer_id at each position
+        0..len(route) - entry p is dm[pred][c] + dm[c][succ] - dm[pred][succ]
+        
+        arc_lengths (from get_arc_lengths) can be passed in when pricing many
+        customers against an unchanged route
+        """
+        if arc_lengths is None:
+            arc_lengths = self.get_arc_lengths()
+        ids = self.customer_ids
+        row = self.dist_matrix[customer_id]
+        depot_leg = row[self.depot.id]
+        if not ids:
+            return [2 * depot_leg - arc_lengths[0]]
+        legs = [row[cid] for cid in ids]
+        legs_in = [depot_leg] + legs
+        legs_out = legs + [depot_leg]
+        return [a + b - arc for a, b, arc in zip(legs_in, legs_out, arc_lengths)]
+    
     def swap_inplace(self, i: int, j: int) -> bool:
         """
         Swap customers at positions i and j WITHOUT creating new route
@@ -254,15 +478,10 @@ class Route:
         # Swap customer IDs
         self.customer_ids[i], self.customer_ids[j] = self.customer_ids[j], self.customer_ids[i]
         
-        # Recalculate from the earlier position
-        start_idx = min(i, j)
-        self._recalculate_from(start_idx)
-        
-        # Check feasibility
-        if not self.is_feasible():
-            # Rollback
+        # Validate from the earlier position without touching the schedule
+        if self.evaluate_suffix(min(i, j)) is None:
+            # Rollback - only the id list was modified
             self.customer_ids[i], self.customer_ids[j] = self.customer_ids[j], self.customer_ids[i]
-            self._recalculate_from(start_idx)
             return False
         
         self.calculate_cost_inplace()
@@ -270,7 +489,8 @@ class Route:
     
     def relocate_inplace(self, from_pos: int, to_pos: int) -> bool:
         """
-        Move customer from from_pos to to_pos in same route
+        Move customer from from_pos so that it ends up at index to_pos
+        (so relocate_inplace(to_pos, from_pos) undoes it)
         Returns True if relocation was successful and feasible
         """
         if from_pos == to_pos or from_pos < 0 or to_pos < 0:
@@ -278,34 +498,14 @@ class Route:
         if from_pos >= len(self.customer_ids) or to_pos >= len(self.customer_ids):
             return False
         
-        # Remove customer from original position
-        customer_id = self.customer_ids.pop(from_pos)
-        self.arrival_times.pop(from_pos)
-        
-        # Adjust to_pos if needed (since we removed an element)
-        if to_pos > from_pos:
-            to_pos -= 1
+        # Move the customer id; the schedule is only rebuilt on success
+        ids = self.customer_ids
+        ids.insert(to_pos, ids.pop(from_pos))
         
-        # Insert at new position
-        self.customer_ids.insert(to_pos, customer_id)
-        self.arrival_times.insert(to_pos, 0.0)
-        
-        # Recalculate from the earlier affected position
-        start_idx = min(from_pos, to_pos)
-        self._recalculate_from(start_idx)
-        
-        # Check feasibility
-        if not self.is_feasible():
+        # Validate from the earlier affected position
+        if self.evaluate_suffix(min(from_pos, to_pos)) is None:
             # Rollback - remove from to_pos and reinsert at from_pos
-            self.customer_ids.pop(to_pos)
-            self.arrival_times.pop(to_pos)
-            if to_pos < from_pos:
-                self.customer_ids.insert(from_pos, customer_id)
-                self.arrival_times.insert(from_pos, 0.0)
-            else:
-                self.customer_ids.insert(from_pos, customer_id)
-                self.arrival_times.insert(from_pos, 0.0)
-            self._recalculate_from(min(from_pos, to_pos))
+            ids.insert(from_pos, ids.pop(to_pos))
             return False
         
         self.calculate_cost_inplace()
@@ -322,14 +522,10 @@ class Route:
         old_departure = self.departure_time
         self.departure_time = new_departure
         
-        # Recalculate all arrival times
-        self._recalculate_from(0)
-        
-        # Check feasibility
-        if not self.is_feasible():
-            # Rollback
+        # Validate the whole schedule without touching it
+        if self.evaluate_suffix(0) is None:
+            # Rollback - stored arrivals are still those of old_departure
             self.departure_time = old_departure
-            self._recalculate_from(0)
             return False
         
         self.calculate_cost_inplace()
@@ -350,18 +546,22 @@ class Route:
 
         waiting = 0.0
 
+        dm = self.dist_matrix
+        ready = self.customer_arrays.ready_time
+        service = self.customer_arrays.service_time
         time = self.departure_time
-        prev = self.depot
+        prev_id = self.depot.id
         for cust_id in self.customer_ids:
-            customer = self.customers_lookup[cust_id]
-            travel = distance(prev, customer)
+            travel = dm[prev_id][cust_id]
             raw_arrival = time + travel
-            wait = max(0.0, customer.ready_time - raw_arrival)
+            wait = ready[cust_id] - raw_arrival
+            if wait < 0.0:
+                wait = 0.0
             waiting += wait
 
             arrival = raw_arrival + wait
-            time = arrival + customer.service_time
-            prev = customer
+            time = arrival + service[cust_id]
+            prev_id = cust_id
 
         return waiting
     
@@ -377,43 +577,89 @@ class Route:
         if len(self.arrival_times) != len(self.customer_ids):
             self.calculate_cost_inplace()
 
+        dm = self.dist_matrix
+        ready = self.customer_arrays.ready_time
+        service = self.customer_arrays.service_time
         time = self.departure_time
-        prev = self.depot
+        prev_id = self.depot.id
         for cust_id in self.customer_ids:
-            customer = self.customers_lookup[cust_id]
-            travel = distance(prev, customer)
+            travel = dm[prev_id][cust_id]
             raw_arrival = time + travel
-            wait = max(0.0, customer.ready_time - raw_arrival)
+            wait = ready[cust_id] - raw_arrival
+            if wait < 0.0:
+                wait = 0.0
             contributions.append((cust_id, wait))
             arrival = raw_arrival + wait
-            time = arrival + customer.service_time
-            prev = customer
+            time = arrival + service[cust_id]
+            prev_id = cust_id
 
         return contributions
 
     
+    def get_waiting_prefix(self) -> List[float]:
+        """
+        Prefix sums of waiting: entry k is the waiting before position k
+        (length n + 1, last entry is the route's total waiting)
+        """
+        prefix = [0.0]
+        for _, wait in self.get_waiting_contributions():
+            prefix.append(prefix[-1] + wait)
+        return prefix
+
+    
+    def get_latest_arrivals(self) -> List[float]:
+        """
+        Latest arrival at each position that keeps the rest of the route
+        within its time windows (backward pass over due dates). A change
+        before position k is feasible from k on iff the new arrival at k
+        is <= entry k - the O(1) counterpart of re-propagating the suffix
+        """
+        ids = self.customer_ids
+        if not ids:
+            return []
+        
+        dm = self.dist_matrix
+        due = self.customer_arrays.due_date
+        service = self.customer_arrays.service_time
+        latest = [0.0] * len(ids)
+        next_id = ids[-1]
+        bound = due[next_id]
+        latest[-1] = bound
+        for k in range(len(ids) - 2, -1, -1):
+            cust_id = ids[k]
+            bound = bound - dm[cust_id][next_id] - service[cust_id]
+            if due[cust_id] < bound:
+                bound = due[cust_id]
+            latest[k] = bound
+            next_id = cust_id
+        return latest
+    
     def get_tight_window_count(self, slack_threshold: float = 10.0) -> int:
         """Count customers with slack < threshold"""
-        count = 0
-        for i, arrival in enumerate(self.arrival_times):
-            customer = self.get_customer(i)
-            slack = customer.due_date - arrival
-            if slack < slack_threshold:
-                count += 1
-        return count
+        return self.get_slack_summary(slack_threshold)[0]
     
     def get_average_slack(self) -> float:
         """Calculate average time window slack"""
+        return self.get_slack_summary()[1]
+    
+    def get_slack_summary(self, slack_threshold: float = 10.0) -> Tuple[int, float]:
+        """
+        Tight-window count and average slack in a single pass over the
+        schedule (reads due dates from customer_arrays)
+        """
         if len(self.customer_ids) == 0:
-            return 0.0
+            return 0, 0.0
         
+        due = self.customer_arrays.due_date
+        count = 0
         total_slack = 0.0
-        for i, arrival in enumerate(self.arrival_times):
-            customer = self.get_customer(i)
-            slack = customer.due_date - arrival
+        for cust_id, arrival in zip(self.customer_ids, self.arrival_times):
+            slack = due[cust_id] - arrival
+            if slack < slack_threshold:
+                count += 1
             total_slack += slack
         
-        return total_slack / len(self.customer_ids)
+        return count, total_slack / len(self.customer_ids)
 
 
 class Solution:
@@ -451,18 +697,28 @@ class Solution:
 
         self.num_vehicles = len(self.routes)
 
-        # λ: dynamic penalty using distance and waiting signals
-        avg_route_cost = base_distance / max(self.num_vehicles, 1)
-        avg_waiting = 0.0
+        total_waiting = 0.0
         for r in self.routes:
-            avg_waiting += r.get_waiting_time()
-        avg_waiting = avg_waiting / max(self.num_vehicles, 1)
+            total_waiting += r.get_waiting_time()
+
+        self.total_cost = self.penalised_cost(base_distance, total_waiting, self.num_vehicles)
+    
+    @staticmethod
+    def penalised_cost(base_cost: float, total_waiting: float, num_vehicles: int) -> float:
+        """
+        Penalised objective for the given route totals (see update_cost).
+        Non-decreasing in base_cost and total_waiting, so lower bounds on
+        those give a lower bound on the objective.
+        """
+        # λ: dynamic penalty using distance and waiting signals
+        avg_route_cost = base_cost / max(num_vehicles, 1)
+        avg_waiting = total_waiting / max(num_vehicles, 1)
 
         # Encourage fewer vehicles but react to waiting (tight time windows)
         lambda_penalty = 0.6 * avg_route_cost + 0.2 * avg_waiting + 30.0
         lambda_penalty = max(40.0, min(lambda_penalty, 250.0))
 
-        self.total_cost = base_distance + lambda_penalty * self.num_vehicles
+        return base_cost + lambda_penalty * num_vehicles
     
     def is_feasible(self) -> bool:
         """Check if all routes are feasible"""
@@ -1,15 +1,20 @@
 """
-On-the-fly distance calculation utilities
-NO CACHING - all calculations are O(1) space
+Distance calculation utilities
+Pairwise helpers are O(1) space; the dense matrices are built once per instance
 """
 
+import heapq
 import math
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Iterable, List
 
 if TYPE_CHECKING:
     from core.data_structures import Customer
 
 
+# Fixed-point scale for integer distances (1 unit = 0.01 distance)
+DISTANCE_SCALE = 100
+
+
 def euclidean_distance(c1: 'Customer', c2: 'Customer') -> float:
     """
     Calculate Euclidean distance between two customers
@@ -26,8 +31,57 @@ def travel_time(c1: 'Customer', c2: 'Customer', speed: float = 1.0) -> float:
     return euclidean_distance(c1, c2) / speed
 
 
+def build_distance_matrix(depot: 'Customer', customers: Iterable['Customer']) -> List[List[float]]:
+    """
+    Build a dense Euclidean distance matrix indexed by customer id
+    Row/column 0..max_id; the depot is included like any other node
+    Memory: O(n^2) floats, built once per instance
+    
+    Rows stay plain lists: an array.array row would box a new float on
+    every read, and reads vastly outnumber this one-off build. The
+    distance is symmetric (bit-for-bit), so each pair is computed once
+    """
+    nodes = [depot]
+    nodes.extend(customers)
+    size = max(c.id for c in nodes) + 1
+    coords = [(c.id, c.x, c.y) for c in nodes]
+
+    matrix = [[0.0] * size for _ in range(size)]
+    for k, (a_id, ax, ay) in enumerate(coords):
+        row = matrix[a_id]
+        for b_id, bx, by in coords[k + 1:]:
+            d = math.sqrt((ax - bx)**2 + (ay - by)**2)
+            row[b_id] = d
+            matrix[b_id][a_id] = d
+    return matrix
+
 
+def scale_distance_matrix(matrix: List[List[float]], scale: int = DISTANCE_SCALE) -> List[List[int]]:
+    """
+    Quantize a distance matrix to integer units of 1/scale
+    Each entry is within 0.5 units of the exact scaled distance
+    """
+    return [[int(round(d * scale)) for d in row] for row in matrix]
 
 
+def nearest_neighbors(matrix: List[List[float]], node_id: int,
+                      candidates: Iterable[int], k: int) -> List[int]:
+    """
+    The k candidates closest to node_id (node_id itself excluded), nearest first
+    Partial selection - O(n log k), no full sort
+    """
+    row = matrix[node_id]
+    others = (c for c in candidates if c != node_id)
+    return heapq.nsmallest(k, others, key=row.__getitem__)
 
 
+def build_neighbor_lists(matrix: List[List[float]], node_ids: Iterable[int],
+                         k: int) -> Dict[int, List[int]]:
+    """
+    k nearest other nodes of every node, nearest first (granular search)
+    Coordinates never change, so build once per instance; any prefix of a
+    list is the matching nearest_neighbors() answer for a smaller k
+    """
+    node_ids = list(node_ids)
+    return {node_id: nearest_neighbors(matrix, node_id, node_ids, k)
+            for node_id in node_ids}
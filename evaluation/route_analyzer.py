@@ -3,7 +3,8 @@ Lightweight route criticality scoring
 Returns indices only, no route copies
 """
 
-from typing import List, Tuple
+import heapq
+from typing import Dict, List, Optional, Tuple
 from core.data_structures import Route
 
 
@@ -24,8 +25,7 @@ def calculate_criticality_score(route: Route) -> float:
         return 0.0
     
     waiting_time = route.get_waiting_time()
-    tight_count = route.get_tight_window_count(slack_threshold=10.0)
-    avg_slack = route.get_average_slack()
+    tight_count, avg_slack = route.get_slack_summary(slack_threshold=10.0)
     
     # Normalize and combine factors
     # Higher waiting time = more critical
@@ -43,10 +43,14 @@ def calculate_criticality_score(route: Route) -> float:
     return score
 
 
-def identify_critical_route_indices(solution, top_n: int = 5) -> List[int]:
+def identify_critical_route_indices(solution, top_n: int = 5,
+                                    score_cache: Optional[Dict[int, float]] = None) -> List[int]:
     """
     Identify top N most critical routes
     
+    score_cache (optional) maps id(route) -> score and is reused across
+    calls; the caller must drop the entry of any route it modifies
+    
     Returns:
         List of route indices (not route copies)
     
@@ -55,14 +59,20 @@ def identify_critical_route_indices(solution, top_n: int = 5) -> List[int]:
     scores: List[Tuple[int, float]] = []
     
     for idx, route in enumerate(solution.routes):
-        score = calculate_criticality_score(route)
+        if score_cache is None:
+            score = calculate_criticality_score(route)
+        else:
+            score = score_cache.get(id(route))
+            if score is None:
+                score = calculate_criticality_score(route)
+                score_cache[id(route)] = score
         scores.append((idx, score))
     
-    # Sort by score (descending - highest score first)
-    scores.sort(key=lambda x: x[1], reverse=True)
+    # Partial selection of the top N (descending score, ties keep route
+    # order) - O(R log N) instead of sorting all R routes
+    top = heapq.nlargest(top_n, scores, key=lambda x: x[1])
     
-    # Return top N indices
-    return [idx for idx, score in scores[:top_n]]
+    return [idx for idx, score in top]
 
 
 def is_critical_route(route: Route, 
@@ -75,8 +85,7 @@ def is_critical_route(route: Route,
     Returns True if route is critical (needs improvement)
     """
     waiting_time = route.get_waiting_time()
-    tight_count = route.get_tight_window_count(slack_threshold=10.0)
-    avg_slack = route.get_average_slack()
+    tight_count, avg_slack = route.get_slack_summary(slack_threshold=10.0)
     
     return (waiting_time > high_waiting_threshold or
             tight_count > tight_window_threshold or
@@ -3,23 +3,24 @@ Main entry point for VRPTW Solver
 Experiment runner and comparison framework
 """
 
+import os
 import sys
 import time
-import tracemalloc
-import gc
-from pathlib import Path
 
-from core.solomon_loader import load_solomon_instance, load_solomon_subset
-from algorithms.hybrid_solver import solve_vrptw, solve_vrptw_with_stats
-from evaluation.performance_metrics import print_solution_stats, compare_solutions
 
-
-def run_experiment(instance_file: str, max_customers: int = None, random_seed: int = 42):
+def run_experiment(instance_file: str, max_customers: int = None, random_seed: int = 42,
+                   profile_memory: bool = True, neighbor_count: int = None):
     """
     Run MIH-MDS solver on Solomon instance
     
-    Memory profiling included
+    Memory profiling included (tracemalloc) unless profile_memory=False
+    neighbor_count enables granular inter-route search (faster, heuristic)
     """
+    # Solver stack is imported here so CLI usage/errors stay cheap
+    from core.solomon_loader import load_solomon_instance, load_solomon_subset
+    from algorithms.hybrid_solver import solve_vrptw_with_stats
+    from evaluation.performance_metrics import print_solution_stats
+    
     print(f"\n{'='*60}")
     print(f"VRPTW Solver: MIH-MDS Hybrid Algorithm")
     print(f"{'='*60}")
@@ -29,7 +30,9 @@ def run_experiment(instance_file: str, max_customers: int = None, random_seed: i
     print(f"{'='*60}\n")
     
     # Start memory tracking
-    tracemalloc.start()
+    if profile_memory:
+        import tracemalloc
+        tracemalloc.start()
     
     # Load instance
     print("Loading instance...")
@@ -47,8 +50,9 @@ def run_experiment(instance_file: str, max_customers: int = None, random_seed: i
     print(f"Vehicle capacity: {vehicle_capacity}")
     
     # Check memory after loading
-    current_mem, peak_mem = tracemalloc.get_traced_memory()
-    print(f"Memory after loading: {current_mem / 1024 / 1024:.2f} MB")
+    if profile_memory:
+        current_mem, peak_mem = tracemalloc.get_traced_memory()
+        print(f"Memory after loading: {current_mem / 1024 / 1024:.2f} MB")
     
     # Solve
     print("\nSolving with MIH-MDS hybrid algorithm...")
@@ -63,16 +67,18 @@ def run_experiment(instance_file: str, max_customers: int = None, random_seed: i
         min_candidates=5,           # at least 5 candidates each step
         max_mds_iterations=120,     # more MDS iterations for better refinement
         top_n_critical=10,          # improve more routes per iteration
-        random_seed=random_seed
+        random_seed=random_seed,
+        neighbor_count=neighbor_count
     )
     
     solve_time = time.time() - start_time
     
     # Memory after solving
-    current_mem, peak_mem = tracemalloc.get_traced_memory()
-    print(f"\nMemory usage:")
-    print(f"  Current: {current_mem / 1024 / 1024:.2f} MB")
-    print(f"  Peak: {peak_mem / 1024 / 1024:.2f} MB")
+    if profile_memory:
+        current_mem, peak_mem = tracemalloc.get_traced_memory()
+        print(f"\nMemory usage:")
+        print(f"  Current: {current_mem / 1024 / 1024:.2f} MB")
+        print(f"  Peak: {peak_mem / 1024 / 1024:.2f} MB")
     
     # Print results
     print(f"\n{'='*60}")
@@ -81,23 +87,30 @@ def run_experiment(instance_file: str, max_customers: int = None, random_seed: i
     print_solution_stats(solution, stats)
     print(f"{'='*60}\n")
     
-    tracemalloc.stop()
+    if profile_memory:
+        tracemalloc.stop()
     
     return solution, stats
 
 
-def compare_with_ortools(instance_file: str, max_customers: int = None):
+def compare_with_ortools(instance_file: str, max_customers: int = None,
+                         neighbor_count: int = None, profile_memory: bool = True):
     """
     Compare MIH-MDS with OR-Tools baseline
     Runs in separate processes to avoid memory conflicts
     """
+    import gc
+    from evaluation.performance_metrics import compare_solutions
+    
     print(f"\n{'='*60}")
     print("COMPARISON: MIH-MDS vs OR-Tools")
     print(f"{'='*60}\n")
     
     # Run custom algorithm
     print("1. Running Custom MIH-MDS...")
-    solution_custom, stats_custom = run_experiment(instance_file, max_customers)
+    solution_custom, stats_custom = run_experiment(instance_file, max_customers,
+                                                   profile_memory=profile_memory,
+                                                   neighbor_count=neighbor_count)
     
     # Clear memory
     del solution_custom
@@ -122,6 +135,23 @@ def compare_with_ortools(instance_file: str, max_customers: int = None):
     return stats_custom
 
 
+def pin_to_cpu(cpu: int) -> bool:
+    """
+    Pin this process to one CPU core so repeated runs keep the same
+    cache and give comparable timings
+    
+    cpu indexes the cores this process is currently allowed to run on.
+    Returns False where affinity is unsupported (e.g. macOS, Windows);
+    raises OSError if the kernel rejects the affinity change
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        return False
+    
+    allowed = sorted(os.sched_getaffinity(0))
+    os.sched_setaffinity(0, {allowed[cpu % len(allowed)]})
+    return True
+
+
 def main():
     """Main entry point"""
     if len(sys.argv) < 2:
@@ -134,18 +164,53 @@ def main():
     instance_file = sys.argv[1]
     max_customers = int(sys.argv[2]) if len(sys.argv) > 2 else None
     
-    if not Path(instance_file).exists():
+    try:
+        os.stat(instance_file)
+    except OSError:
         print(f"Error: Instance file not found: {instance_file}")
         sys.exit(1)
     
+    # Optional: VRPTW_PIN_CPU=<n> pins the solver to one core for benchmarking
+    pin_cpu = os.environ.get('VRPTW_PIN_CPU')
+    if pin_cpu is not None:
+        try:
+            if not pin_to_cpu(int(pin_cpu)):
+                print("Warning: CPU pinning not supported on this platform")
+        except (ValueError, OSError) as e:
+            print(f"Warning: could not pin to CPU {pin_cpu!r} ({e}); running unpinned")
+    
+    # Optional: VRPTW_NEIGHBORS=<k> restricts inter-route moves to routes
+    # near each customer's k nearest customers (faster on large instances)
+    neighbors = os.environ.get('VRPTW_NEIGHBORS')
+    neighbor_count = None
+    if neighbors:
+        try:
+            neighbor_count = int(neighbors)
+        except ValueError:
+            neighbor_count = 0
+        if neighbor_count < 1:
+            print(f"Error: VRPTW_NEIGHBORS must be a positive integer, got {neighbors!r}")
+            sys.exit(1)
+    
+    # Optional: VRPTW_PROFILE_MEMORY=0 skips tracemalloc, which slows the
+    # solver down, for timing runs
+    profile_flag = os.environ.get('VRPTW_PROFILE_MEMORY', '1')
+    if profile_flag not in ('0', '1'):
+        print(f"Error: VRPTW_PROFILE_MEMORY must be 0 or 1, got {profile_flag!r}")
+        sys.exit(1)
+    profile_memory = profile_flag == '1'
+    
     # Run experiment
     try:
-        solution, stats = run_experiment(instance_file, max_customers)
+        solution, stats = run_experiment(instance_file, max_customers,
+                                         profile_memory=profile_memory,
+                                         neighbor_count=neighbor_count)
         
         # Optionally compare with OR-Tools
         compare_choice = input("\nCompare with OR-Tools? (y/n): ").strip().lower()
         if compare_choice == 'y':
-            compare_with_ortools(instance_file, max_customers)
+            compare_with_ortools(instance_file, max_customers, neighbor_count,
+                                 profile_memory)
         
     except Exception as e:
         print(f"\nError: {e}")
@@ -1,14 +1,75 @@
-from core.data_structures import Solution
-from core.data_structures import distance
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from core.data_structures import Route, Solution
+from core.geometry import build_neighbor_lists
 from operators.intra_route_2opt import intra_route_2opt_inplace
 
 
-def inter_route_relocate_inplace(solution: Solution, arrival_buffer=None) -> bool:
+class RouteSummary(NamedTuple):
+    """
+    Everything this operator derives from a route's schedule
+
+    insertions starts empty and maps customer id -> (distance delta per
+    position, positions cheapest first); it lives and dies with the
+    summary, so a changed route never serves stale deltas
+    """
+    distance: float
+    waiting: float
+    arc_lengths: List[float]
+    departs: List[float]              # stop departures, depot first
+    ids_by_waiting: List[int]         # waiting contribution, high to low
+    latest_arrivals: List[float]
+    insertions: Dict[int, Tuple[List[float], List[int]]]
+
+
+def _route_summary(route: Route,
+                   cache: Optional[Dict[int, Tuple[tuple, RouteSummary]]]) -> RouteSummary:
+    """
+    RouteSummary for route, from cache when the route is unchanged
+    
+    cache maps id(route) -> (state, summary) and is reused across calls;
+    entries are checked against the route's ids and departure time, so
+    modified routes are simply recomputed
+    """
+    state = (tuple(route.customer_ids), route.departure_time)
+    if cache is not None:
+        hit = cache.get(id(route))
+        if hit is not None and hit[0] == state:
+            return hit[1]
+    
+    service = route.customer_arrays.service_time
+    departs = [route.departure_time] + [arrival + service[cid] for cid, arrival
+                                        in zip(route.customer_ids, route.arrival_times)]
+    contribs = route.get_waiting_contributions()
+    contribs.sort(key=lambda x: x[1], reverse=True)
+    summary = RouteSummary(route.get_total_distance(), route.get_waiting_time(),
+                           route.get_arc_lengths(), departs, [cid for cid, _ in contribs],
+                           route.get_latest_arrivals(), {})
+    
+    if cache is not None:
+        cache[id(route)] = (state, summary)
+    return summary
+
+
+def inter_route_relocate_inplace(solution: Solution, arrival_buffer=None,
+                                 neighbor_count: Optional[int] = None,
+                                 route_cache: Optional[Dict[int, Tuple[tuple, RouteSummary]]] = None,
+                                 neighbors: Optional[Dict[int, List[int]]] = None) -> bool:
     """
     Inter-route relocate using a classic first-improvement local search:
     try moving one customer from one route to another and accept iff the
     global penalised objective (as defined in Solution.update_cost) improves
     and feasibility is preserved.
+
+    neighbor_count enables granular search: a customer is only moved to
+    routes serving one of its neighbor_count nearest customers, next to one
+    of those neighbors (or the depot). Faster but heuristic - None
+    (default) scans every route and position. Pass neighbors (from
+    geometry.build_neighbor_lists, at least neighbor_count long) when
+    calling repeatedly; otherwise the lists are built on every call.
+
+    route_cache (optional) keeps per-route summaries across calls; a call
+    only touches two routes, so most summaries are reused by the next one
     """
 
     routes = solution.routes
@@ -19,6 +80,36 @@ def inter_route_relocate_inplace(solution: Solution, arrival_buffer=None) -> boo
     solution.update_cost()
     current_obj = solution.total_cost
 
+    # Route totals for the lower bound below (route state is restored after
+    # every rejected trial, so these stay valid for the whole call)
+    num_routes = len(routes)
+    summaries = {id(r): _route_summary(r, route_cache) for r in routes}
+    route_dist = {key: summary.distance for key, summary in summaries.items()}
+    route_wait = {key: summary.waiting for key, summary in summaries.items()}
+    # Destination geometry, reused to price every customer against it
+    route_arcs = {key: summary.arc_lengths for key, summary in summaries.items()}
+    # Departure time from every stop (depot first), read off the stored
+    # schedule: the earliest moment a customer inserted after that stop
+    # could be reached from it
+    route_departs = {key: summary.departs for key, summary in summaries.items()}
+    # Latest feasible arrival per position, for the O(1) push-forward check
+    route_latest = {key: summary.latest_arrivals for key, summary in summaries.items()}
+    route_insertions = {key: summary.insertions for key, summary in summaries.items()}
+    # Spare capacity per route (loads are restored after every rejected trial)
+    residual = {id(r): r.vehicle_capacity - r.current_load for r in routes}
+    if neighbor_count is not None:
+        route_of = {cid: r for r in routes for cid in r.customer_ids}
+        if neighbors is None:
+            neighbors = build_neighbor_lists(routes[0].dist_matrix,
+                                             routes[0].customers_lookup,
+                                             neighbor_count)
+    # Fresh after update_cost(); trials re-cost only the two routes they touch
+    route_cost = {id(r): r.total_cost for r in routes}
+    infeasible = {id(r) for r in routes if not r.is_feasible()}
+    base_total = sum(r.total_cost for r in routes)
+    wait_total = sum(route_wait.values())
+    penalised_cost = solution.penalised_cost
+
     # Prefer smaller routes as sources, but consider waiting contribution
     routes_sorted = sorted(routes, key=lambda r: len(r.customer_ids))
 
@@ -26,65 +117,201 @@ def inter_route_relocate_inplace(solution: Solution, arrival_buffer=None) -> boo
         if len(src.customer_ids) == 0:
             continue
 
-        # Sort customers by waiting contribution (high to low)
-        src.calculate_cost_inplace()
-        contribs = src.get_waiting_contributions()
-        contribs.sort(key=lambda x: x[1], reverse=True)
-        src_ids_ordered = [cid for cid, _ in contribs]
+        # Customers by waiting contribution (high to low)
+        src_key = id(src)
+        src_ids_ordered = summaries[src_key].ids_by_waiting
+        # id -> position: O(1) membership test and position lookup
+        src_pos_of = {cid: pos for pos, cid in enumerate(src.customer_ids)}
+
+        demands = src.customer_arrays.demand
+        due_dates = src.customer_arrays.due_date
+        ready_times = src.customer_arrays.ready_time
+        service = src.customer_arrays.service_time
+        dm = src.dist_matrix
+        depot_id = src.depot.id
+
+        # Destinations without room for even the lightest src customer can
+        # never accept a move from src; drop them once per source route
+        min_demand = min(demands[cid] for cid in src_pos_of)
+        dst_candidates = [dst for dst in routes
+                          if dst is not src and residual[id(dst)] >= min_demand]
 
         for cust_id in src_ids_ordered:
-            if cust_id not in src.customer_ids:
+            src_pos = src_pos_of.get(cust_id)
+            if src_pos is None:
                 continue
 
-            customer = src.get_customer_by_id(cust_id)
+            demand = demands[cust_id]
+            due_date = due_dates[cust_id]
+            ready_time = ready_times[cust_id]
+            service_time = service[cust_id]
+            cust_row = dm[cust_id]
 
-            for dst in routes:
-                if dst is src:
-                    continue
+            # One filtering pass per customer: capacity (and, for granular
+            # search, neighbor routes) - the dst loop below runs unchecked
+            dst_fits = [dst for dst in dst_candidates if residual[id(dst)] >= demand]
+            if neighbor_count is not None:
+                near = set(neighbors[cust_id][:neighbor_count])
+                near_routes = {id(route_of[nb]) for nb in near if nb in route_of}
+                near.add(depot_id)
+                dst_fits = [dst for dst in dst_fits if id(dst) in near_routes]
+
+            # Trial lists are separate scratch lists; the originals are
+            # never mutated, so a reference savepoint is an exact rollback
+            src_saved = src.savepoint()
+            # Built on the first trial only - most customers never get one
+            src_ids_after = None
+            # If src becomes empty, we will consider removing it
+            remove_src = len(src.customer_ids) == 1
+
+            # Distance of src without the customer
+            src_dist_after = route_dist[src_key] + src.get_removal_distance_delta(src_pos)
+            trial_routes = num_routes - 1 if remove_src else num_routes
 
-                # Capacity pre-check
-                if dst.current_load + customer.demand > dst.vehicle_capacity:
+            # Loads after the move are fixed per (customer, dst) pair
+            src_load_after = src.current_load - demand
+
+            # Every route cost is distance + waiting and the objective is
+            # monotone in both, so other routes' totals plus the two new
+            # distances bound the trial objective from below (src terms
+            # folded in once here, dst terms per pair)
+            src_base = base_total - src.total_cost
+            src_wait = wait_total - route_wait[src_key]
+
+            for dst in dst_fits:
+                dst_key = id(dst)
+                pair_base = (src_base - dst.total_cost
+                             + src_dist_after + route_dist[dst_key])
+                pair_wait = src_wait - route_wait[dst_key]
+                # Pricing only depends on dst and the customer, so it is
+                # reused until dst itself changes
+                dst_insertions = route_insertions[dst_key]
+                priced = dst_insertions.get(cust_id)
+                if priced is None:
+                    insertion_deltas = dst.get_insertion_distance_deltas(
+                        cust_id, route_arcs[dst_key])
+                    priced = (insertion_deltas,
+                              sorted(range(len(insertion_deltas)),
+                                     key=insertion_deltas.__getitem__))
+                    dst_insertions[cust_id] = priced
+                insertion_deltas, cheapest_first = priced
+                # Whole-pair rejection: if even the cheapest position can't
+                # beat the incumbent, no position of this dst can
+                if penalised_cost(pair_base + insertion_deltas[cheapest_first[0]],
+                                  pair_wait, trial_routes) >= current_obj:
                     continue
 
-                # Try all insertion positions
-                for pos in range(len(dst.customer_ids) + 1):
-                    # --- backup state ---
-                    src_ids_before = list(src.customer_ids)
-                    dst_ids_before = list(dst.customer_ids)
-                    src_load_before = src.current_load
-                    dst_load_before = dst.current_load
-                    routes_before = list(solution.routes)
+                dst_saved = dst.savepoint()
+                dst_load_after = dst.current_load + demand
+                dst_ids_before = dst.customer_ids
+                # Scratch for this pair, allocated on the first trial: the
+                # customer is moved between positions in place afterwards
+                dst_ids_trial = None
+                dst_departs = route_departs[dst_key]
+                dst_latest = route_latest[dst_key]
+                dst_len = len(dst_ids_before)
 
-                    # --- apply tentative move ---
-                    src.customer_ids.remove(cust_id)
-                    dst.customer_ids.insert(pos, cust_id)
-                    src.current_load -= customer.demand
-                    dst.current_load += customer.demand
+                # The bound is monotone in the delta: scan positions
+                # cheapest-first and stop at the first one that fails; the
+                # survivors are then tried in route order as before
+                viable = []
+                for pos in cheapest_first:
+                    if penalised_cost(pair_base + insertion_deltas[pos], pair_wait,
+                                      trial_routes) >= current_obj:
+                        break
+                    viable.append(pos)
+                viable.sort()
 
-                    # If src becomes empty, we will consider removing it
-                    remove_src = len(src.customer_ids) == 0
-                    if remove_src:
-                        solution.routes = [r for r in solution.routes if r is not src]
+                # Try the insertion positions that pass the bound
+                for pos in viable:
+                    pred_id = dst_ids_before[pos - 1] if pos > 0 else depot_id
+                    if neighbor_count is not None:
+                        succ_id = dst_ids_before[pos] if pos < len(dst_ids_before) else depot_id
+                        if pred_id not in near and succ_id not in near:
+                            continue
+                    # The prefix schedule is unchanged by the move, so if the
+                    # customer can't be reached by its due date from the
+                    # previous stop, the trial is infeasible - skip it
+                    arrival = dst_departs[pos] + cust_row[pred_id]
+                    if arrival > due_date:
+                        continue
+                    # ... and the rest of the route stays feasible iff the
+                    # successor is reached by its latest arrival (float slack:
+                    # borderline cases still go to the exact trial below)
+                    if pos < dst_len:
+                        if arrival < ready_time:
+                            arrival = ready_time
+                        succ_arrival = (arrival + service_time
+                                        + cust_row[dst_ids_before[pos]])
+                        if succ_arrival > dst_latest[pos] + 1e-6:
+                            continue
+
+                    # --- apply tentative move ---
+                    if src_ids_after is None:
+                        src_ids_before = src.customer_ids
+                        src_ids_after = (src_ids_before[:src_pos]
+                                         + src_ids_before[src_pos + 1:])
+                        # Pre-sized so calculate_cost_inplace writes into it
+                        # instead of allocating on every trial
+                        src_arrivals_after = [0.0] * len(src_ids_after)
+                    if dst_ids_trial is None:
+                        dst_ids_trial = dst_ids_before[:]
+                        dst_ids_trial.insert(pos, cust_id)
+                        dst_arrivals_trial = [0.0] * len(dst_ids_trial)
+                    else:
+                        del dst_ids_trial[trial_pos]
+                        dst_ids_trial.insert(pos, cust_id)
+                    trial_pos = pos
+                    src.customer_ids = src_ids_after
+                    src.arrival_times = src_arrivals_after
+                    dst.customer_ids = dst_ids_trial
+                    dst.arrival_times = dst_arrivals_trial
+                    src.current_load = src_load_after
+                    dst.current_load = dst_load_after
 
-                    # Recompute objective and feasibility
-                    solution.update_cost()
-                    feasible = solution.is_feasible()
-                    improved = solution.total_cost < current_obj - 1e-6
+                    # Only src and dst changed: re-cost those two and re-add
+                    # the stored totals of the others, in route order - the
+                    # same sums update_cost would produce (an emptied src is
+                    # dropped, as it will be from solution.routes)
+                    if not remove_src:
+                        src_cost = src.calculate_cost_inplace()
+                    dst_cost = dst.calculate_cost_inplace()
+                    trial_dist = 0.0
+                    trial_wait = 0.0
+                    for r in routes:
+                        if r is src:
+                            if not remove_src:
+                                trial_dist += src_cost
+                                trial_wait += src.get_waiting_time()
+                        elif r is dst:
+                            trial_dist += dst_cost
+                            trial_wait += dst.get_waiting_time()
+                        else:
+                            key = id(r)
+                            trial_dist += route_cost[key]
+                            trial_wait += route_wait[key]
+                    improved = (penalised_cost(trial_dist, trial_wait, trial_routes)
+                                < current_obj - 1e-6)
+                    # Every other route keeps its feasibility
+                    feasible = (improved and src.is_feasible() and dst.is_feasible()
+                                and (not infeasible
+                                     or infeasible <= {src_key, dst_key}))
 
                     if feasible and improved:
+                        # Trials never touch solution.routes; an emptied src
+                        # is only dropped now that the move is accepted
+                        if remove_src:
+                            routes.remove(src)
                         # Post-move route re-optimization (2-opt) on affected routes
                         intra_route_2opt_inplace(dst)
-                        if src in solution.routes:
+                        if not remove_src:
                             intra_route_2opt_inplace(src)
                         solution.update_cost()
                         return True
 
-                    # Rollback
-                    solution.routes = routes_before
-                    src.customer_ids = src_ids_before
-                    dst.customer_ids = dst_ids_before
-                    src.current_load = src_load_before
-                    dst.current_load = dst_load_before
-                    solution.update_cost()
+                    # Rollback: the trial only ever assigned scratch lists,
+                    # so restoring the savepoints is an exact O(1) undo
+                    src.restore(src_saved)
+                    dst.restore(dst_saved)
 
     return False
@@ -4,12 +4,27 @@ Intra-route 2-opt operator (FIRST-IMPROVEMENT).
 Operates IN PLACE on a Route:
 - Considers all (i, j) pairs with 0 <= i < j < n
 - Reverses segment customer_ids[i:j+1]
-- Recomputes schedule/cost using existing Route methods
+- Validates candidates with Route.evaluate_suffix (from position i only,
+  stopping early once the tail after j is back on its stored schedule)
 - Enforces time-window feasibility
 - Accepts first move with improved (distance + waiting)
+- Skips reversals whose integer distance delta already exceeds the
+  route's current waiting (waiting can never drop below zero)
 """
 
+import math
+
 from core.data_structures import Route
+from core.geometry import DISTANCE_SCALE
+
+
+# Each scaled entry is off by at most 0.5 units; a 2-opt delta sums 4 entries
+ROUNDING_SLACK = 2
+
+
+def _reverse_segment(ids: list, i: int, j: int) -> None:
+    """Reverse ids[i..j] in place with one C-level slice assignment."""
+    ids[i:j + 1] = ids[j:i - 1:-1] if i > 0 else ids[j::-1]
 
 
 def intra_route_2opt_inplace(route: Route) -> bool:
@@ -26,57 +41,47 @@ def intra_route_2opt_inplace(route: Route) -> bool:
     # Ensure cost/schedule are in sync
     route.calculate_cost_inplace()
     old_distance = route.get_total_distance()
-    old_waiting = route.get_waiting_time()
+
+    # Waiting before position i is untouched by reversing [i, j]
+    wait_prefix = route.get_waiting_prefix()
+    old_waiting = wait_prefix[-1]
     old_obj = old_distance + old_waiting
 
+    # Integer budget: a move can only improve if its extra distance is
+    # smaller than the waiting it could remove
+    wait_budget = math.ceil(old_waiting * DISTANCE_SCALE)
+    ids = route.customer_ids
+    dm = route.dist_matrix
+    sdm = route.scaled_dist_matrix
+    depot_id = route.depot.id
+
     # Try all (i, j) pairs, first-improvement
     for i in range(n - 2):
+        prev_id = ids[i - 1] if i > 0 else depot_id
         for j in range(i + 1, n):
-            # In-place segment reversal [i, j]
-            left, right = i, j
-            while left < right:
-                route.customer_ids[left], route.customer_ids[right] = (
-                    route.customer_ids[right],
-                    route.customer_ids[left],
-                )
-                left += 1
-                right -= 1
-
-            # Recompute schedule/cost and check feasibility
-            route.calculate_cost_inplace()
-
-            if not route.is_feasible():
-                # Roll back change (reverse the same segment again)
-                left, right = i, j
-                while left < right:
-                    route.customer_ids[left], route.customer_ids[right] = (
-                        route.customer_ids[right],
-                        route.customer_ids[left],
-                    )
-                    left += 1
-                    right -= 1
-                route.calculate_cost_inplace()
+            next_id = ids[j + 1] if j + 1 < n else depot_id
+            delta = (sdm[prev_id][ids[j]] + sdm[ids[i]][next_id]
+                     - sdm[prev_id][ids[i]] - sdm[ids[j]][next_id])
+            if delta - ROUNDING_SLACK >= wait_budget:
                 continue
 
-            new_distance = route.get_total_distance()
-            new_waiting = route.get_waiting_time()
-            new_obj = new_distance + new_waiting
-
-            if new_obj < old_obj - 1e-6:
-                # First improving move accepted
-                return True
-
-            # Not improving: roll back
-            left, right = i, j
-            while left < right:
-                route.customer_ids[left], route.customer_ids[right] = (
-                    route.customer_ids[right],
-                    route.customer_ids[left],
-                )
-                left += 1
-                right -= 1
-            route.calculate_cost_inplace()
+            # Tentative reversal; only [i, n) needs re-validation
+            _reverse_segment(ids, i, j)
+            # Stops after j keep their positions, so propagation can stop
+            # at the first one whose arrival is unchanged
+            suffix_waiting = route.evaluate_suffix(i, j + 1, wait_prefix)
 
-    return False
+            if suffix_waiting is not None:
+                new_distance = old_distance + (dm[prev_id][ids[i]] + dm[ids[j]][next_id]
+                                               - dm[prev_id][ids[j]] - dm[ids[i]][next_id])
+                new_obj = new_distance + wait_prefix[i] + suffix_waiting
 
+                if new_obj < old_obj - 1e-6:
+                    # First improving move accepted: commit schedule/cost
+                    route.calculate_cost_inplace()
+                    return True
 
+            # Infeasible or not improving: roll back (state was never touched)
+            _reverse_segment(ids, i, j)
+
+    return False
@@ -3,57 +3,249 @@ Lightweight destroy-and-repair (LNS-style) to escape local minima.
 
 Strategy:
 - Destroy: remove a subset of customers from the most critical routes.
-- Repair: reinsert customers greedily where the penalised objective improves.
+- Repair: reinsert customers greedily where the penalised objective improves
+  (first route that accepts, cheapest insertion overall with
+  repair="best", or highest regret first with repair="regret").
 
 All operations are IN PLACE; uses Route.insert_inplace for feasibility.
 """
 
+import heapq
 import random
-from typing import List
-from core.data_structures import Solution, Route, Customer
+from typing import Callable, List, Optional, Set, Tuple
+from core.data_structures import Solution, Route
 from evaluation.route_analyzer import identify_critical_route_indices
+from operators.intra_route_2opt import intra_route_2opt_inplace
 
 
-def _try_insert_customer(route: Route, customer_id: int) -> bool:
+# Default k for regret repair: a customer's regret sums the extra cost of
+# its 2nd..kth best routes over its best one
+REGRET_K = 3
+
+
+def _best_insertion(route: Route, customer_id: int) -> Optional[Tuple[float, int]]:
     """
-    Greedy best-position insertion using existing in-place feasibility.
-    Returns True if inserted.
+    Cheapest feasible position for customer_id in route, without
+    modifying it. Positions are priced from their distance delta plus a
+    non-mutating schedule check (Route.evaluate_insertion), after an O(1)
+    time-window screen.
+    Returns (route cost after insertion, position) or None.
     """
+    demand = route.customer_arrays.demand[customer_id]
+    if route.current_load + demand > route.vehicle_capacity:
+        return None
+
+    # Cost after insertion >= current distance + insertion delta, so try
+    # positions cheapest-delta first and stop once the bound can't win
+    base_distance = route.get_total_distance()
+    wait_prefix = route.get_waiting_prefix()
+    deltas = route.get_insertion_distance_deltas(customer_id)
+
+    # O(1) screen per position (same test as inter_route_relocate): the
+    # customer must be reachable by its due date from the unchanged
+    # prefix, and its successor by that stop's latest feasible arrival
+    ids = route.customer_ids
+    n = len(ids)
+    arrivals = route.arrival_times
+    latest = route.get_latest_arrivals()
+    arrays = route.customer_arrays
+    service = arrays.service_time
+    ready_time = arrays.ready_time[customer_id]
+    due_date = arrays.due_date[customer_id]
+    service_time = service[customer_id]
+    cust_row = route.dist_matrix[customer_id]
+    depot_id = route.depot.id
+
     best_pos = None
     best_cost = float('inf')
 
-    for pos in range(len(route.customer_ids) + 1):
-        # Tentative: insert, evaluate, rollback
-        if route.insert_inplace(customer_id, pos):
-            cost = route.total_cost
-            if cost < best_cost:
-                best_cost = cost
-                best_pos = pos
-            # rollback
-            route.customer_ids.pop(pos)
-            route.arrival_times.pop(pos)
-            # recalc from pos to keep state clean
-            route._recalculate_from(pos)
-            route.calculate_cost_inplace()
+    # Lazy cheapest-first order: heapify is O(n) and the bound usually
+    # stops the scan after a few pops, so no full sort is paid for
+    heap = [(delta, pos) for pos, delta in enumerate(deltas)]
+    heapq.heapify(heap)
+    while heap:
+        delta, pos = heapq.heappop(heap)
+        if base_distance + delta - 1e-6 > best_cost:
+            break
+        if pos > 0:
+            pred_id = ids[pos - 1]
+            arrival = arrivals[pos - 1] + service[pred_id] + cust_row[pred_id]
+        else:
+            arrival = route.departure_time + cust_row[depot_id]
+        if arrival > due_date:
+            continue
+        if pos < n:
+            if arrival < ready_time:
+                arrival = ready_time
+            # Float slack: borderline cases go to the exact check below
+            if arrival + service_time + cust_row[ids[pos]] > latest[pos] + 1e-6:
+                continue
+        # Priced without mutating the route
+        suffix_wait = route.evaluate_insertion(customer_id, pos)
+        if suffix_wait is None:
+            continue
+        cost = base_distance + delta + wait_prefix[pos] + suffix_wait
+        if cost < best_cost or (cost == best_cost and pos < best_pos):
+            best_cost = cost
+            best_pos = pos
 
     if best_pos is None:
+        return None
+    return best_cost, best_pos
+
+
+def _try_insert_customer(route: Route, customer_id: int) -> bool:
+    """
+    Greedy best-position insertion using existing in-place feasibility;
+    only the position chosen by _best_insertion goes through
+    Route.insert_inplace.
+    Returns True if inserted.
+    """
+    best = _best_insertion(route, customer_id)
+    if best is None:
         return False
+    return route.insert_inplace(customer_id, best[1])
+
+
+def _repair_best_insertion(solution: Solution, to_remove: List[int],
+                           new_route: Callable[[], Route]) -> Optional[Set[int]]:
+    """
+    Parallel best insertion: repeatedly apply the cheapest (customer,
+    route) insertion over all pending customers. Candidates live in a heap;
+    after an insertion only the modified route is re-priced, and entries
+    priced against an older version of a route are skipped when popped.
+    A new route (from new_route()) is opened only once no pending customer
+    fits anywhere.
+    Returns the ids of touched routes, or None if a customer can't be
+    served even by a route of its own.
+    """
+    pending = list(to_remove)
+    version = {}
+    heap = []
+    tie = 0
+
+    def price(route: Route) -> None:
+        nonlocal tie
+        key = id(route)
+        version[key] = version.get(key, -1) + 1
+        for cid in pending:
+            best = _best_insertion(route, cid)
+            if best is not None:
+                cost, pos = best
+                # tie keeps pops deterministic without comparing routes
+                heapq.heappush(heap, (cost - route.total_cost, tie, cid,
+                                      route, pos, version[key]))
+                tie += 1
+
+    for r in solution.routes:
+        price(r)
+
+    touched = set()
+    while pending:
+        if heap:
+            _, _, cid, route, pos, ver = heapq.heappop(heap)
+            if ver != version[id(route)] or cid not in pending:
+                continue
+            if not route.insert_inplace(cid, pos):
+                continue
+        else:
+            # No pending customer fits an existing route: open one
+            cid = pending[0]
+            route = new_route()
+            if not route.insert_inplace(cid, 0):
+                return None
+            solution.routes.append(route)
+        pending.remove(cid)
+        touched.add(id(route))
+        price(route)
+    return touched
+
 
-    return route.insert_inplace(customer_id, best_pos)
+def _repair_regret(solution: Solution, to_remove: List[int],
+                   new_route: Callable[[], Route], k: int = REGRET_K) -> Optional[Set[int]]:
+    """
+    Regret-k insertion: each step inserts the pending customer that would
+    lose most by waiting (largest gap between its best and next k - 1
+    routes; fewer than k feasible routes counts as infinite) at its best
+    position, ties going to the cheaper insertion. Each customer keeps its
+    best insertion per route, and only the route just modified is
+    re-priced. Customers that fit no route get a new one first.
+    Returns the ids of touched routes, or None if a customer can't be
+    served even by a route of its own.
+    """
+    pending = list(to_remove)
+    options = {cid: {} for cid in pending}
+
+    def price(route: Route) -> None:
+        key = id(route)
+        for cid in pending:
+            best = _best_insertion(route, cid)
+            if best is None:
+                options[cid].pop(key, None)
+            else:
+                options[cid][key] = (best[0] - route.total_cost, best[1], route)
+
+    for r in solution.routes:
+        price(r)
+
+    touched = set()
+    while pending:
+        chosen = None
+        chosen_key = None
+        for cid in pending:
+            costs = sorted(option[0] for option in options[cid].values())
+            if not costs:
+                chosen = cid
+                break
+            regret = sum(costs[j] - costs[0] if j < len(costs) else float('inf')
+                         for j in range(1, k))
+            key = (regret, -costs[0])
+            if chosen_key is None or key > chosen_key:
+                chosen, chosen_key = cid, key
+
+        chosen_options = options[chosen]
+        if chosen_options:
+            _, pos, route = min(chosen_options.values(), key=lambda o: o[0])
+            if not route.insert_inplace(chosen, pos):
+                del chosen_options[id(route)]
+                continue
+        else:
+            route = new_route()
+            if not route.insert_inplace(chosen, 0):
+                return None
+            solution.routes.append(route)
+        pending.remove(chosen)
+        del options[chosen]
+        touched.add(id(route))
+        price(route)
+    return touched
 
 
 def lns_destroy_repair(solution: Solution,
                       removal_fraction: float = 0.2,
                       fixed_remove_count: int = None,
-                      random_seed: int = 42) -> bool:
+                      random_seed: int = 42,
+                      repair: str = "first_fit",
+                      regret_k: int = REGRET_K) -> bool:
     """
     Apply a single destroy-repair iteration.
+    repair: "first_fit" puts each removed customer (in removal order) into
+    the first route that accepts it; "best" applies the cheapest insertion
+    over all removed customers and routes at each step; "regret" inserts
+    the customer with the largest regret-k value first, k = regret_k
+    (see _repair_regret).
     Returns True if the solution improved (penalised objective decreased).
     """
+    if repair not in ("first_fit", "best", "regret"):
+        raise ValueError(f"Unknown repair strategy: {repair}")
+    if regret_k < 2:
+        raise ValueError(f"regret_k must be at least 2, got {regret_k}")
     if not solution.routes:
         return False
 
-    random.seed(random_seed)
+    # Local generator: same stream as seeding the module, without the
+    # global side effect
+    rng = random.Random(random_seed)
     solution.update_cost()
     current_obj = solution.total_cost
 
@@ -77,56 +269,87 @@ def lns_destroy_repair(solution: Solution,
         remove_count = min(fixed_remove_count, total_customers)
     else:
         remove_count = max(5, int(total_customers * removal_fraction))
-    to_remove = random.sample(to_remove, min(remove_count, total_customers))
-
-    # Destroy: remove selected customers from their routes
-    for cid in to_remove:
-        for r in routes:
-            if cid in r.customer_ids:
-                pos = r.customer_ids.index(cid)
-                r.customer_ids.pop(pos)
-                r.arrival_times.pop(pos)
-                r.current_load -= r.customers_lookup[cid].demand
-                r._recalculate_from(max(0, pos - 1))
-                r.calculate_cost_inplace()
-                break
+    to_remove = rng.sample(to_remove, min(remove_count, total_customers))
+
+    # Repair may fail to place a customer anywhere; keep copies of every
+    # route (repair can touch any of them) so that case restores the
+    # solution exactly instead of dropping the removed customers
+    saved = [(r, (list(r.customer_ids), list(r.arrival_times),
+                  r.current_load, r.total_cost)) for r in routes]
+    template = routes[0]
+
+    # Destroy: remove selected customers from their routes. Removals are
+    # grouped per route so each route is compacted and re-costed once
+    # instead of paying a positional pop + full recompute per customer;
+    # every sampled customer came from a critical route, so only those
+    # are visited
+    removed = set(to_remove)
+    for idx in crit_indices:
+        r = routes[idx]
+        ids = r.customer_ids
+        if removed.isdisjoint(ids):
+            continue
+        demands = r.customer_arrays.demand
+        kept = [cid for cid in ids if cid not in removed]
+        r.current_load -= sum(demands[cid] for cid in ids if cid in removed)
+        r.customer_ids = kept
+        r.calculate_cost_inplace()
 
     # Remove empty routes
     solution.routes = [r for r in routes if len(r.customer_ids) > 0]
 
-    touched_routes = set()
+    def abandon() -> bool:
+        for r, state in saved:
+            r.restore(state)
+        solution.routes = routes
+        solution.total_cost = current_obj
+        return False
 
     # Repair: reinsert each removed customer
-    # Use existing depot/capacity from first route
-    if not solution.routes:
-        return False
-    depot = solution.routes[0].depot
-    capacity = solution.routes[0].vehicle_capacity
-    customers_lookup = solution.routes[0].customers_lookup
-
-    for cid in to_remove:
-        customer = customers_lookup[cid]
-        inserted = False
-        # try existing routes first
-        for r in solution.routes:
-            if _try_insert_customer(r, cid):
-                touched_routes.add(id(r))
-                inserted = True
-                break
-        if not inserted:
-            # create new route if needed
-            new_route = Route(depot, capacity, customers_lookup)
-            if new_route.insert_inplace(cid, 0):
-                solution.routes.append(new_route)
-                touched_routes.add(id(new_route))
-            else:
-                # could not insert anywhere; abandon and rollback
-                return False
+    # New routes copy the depot/capacity/shared matrices of a pre-destroy
+    # route (destroy may have emptied every route)
+    depot = template.depot
+    capacity = template.vehicle_capacity
+    customers_lookup = template.customers_lookup
+    dist_matrix = template.dist_matrix
+    scaled_dist_matrix = template.scaled_dist_matrix
+    customer_arrays = template.customer_arrays
+
+    def new_route() -> Route:
+        return Route(depot, capacity, customers_lookup,
+                     dist_matrix, scaled_dist_matrix, customer_arrays)
+
+    if repair == "best":
+        touched_routes = _repair_best_insertion(solution, to_remove, new_route)
+        if touched_routes is None:
+            return abandon()
+    elif repair == "regret":
+        touched_routes = _repair_regret(solution, to_remove, new_route, regret_k)
+        if touched_routes is None:
+            return abandon()
+    else:
+        touched_routes = set()
+        for cid in to_remove:
+            inserted = False
+            # try existing routes first
+            for r in solution.routes:
+                if _try_insert_customer(r, cid):
+                    touched_routes.add(id(r))
+                    inserted = True
+                    break
+            if not inserted:
+                # create new route if needed
+                route = new_route()
+                if route.insert_inplace(cid, 0):
+                    solution.routes.append(route)
+                    touched_routes.add(id(route))
+                else:
+                    # could not insert anywhere; abandon and rollback
+                    return abandon()
 
     # Post-repair polish: 2-opt on touched routes
     for r in solution.routes:
         if id(r) in touched_routes:
-            from operators.intra_route_2opt import intra_route_2opt_inplace
             intra_route_2opt_inplace(r)
 
     solution.update_cost()
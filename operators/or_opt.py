@@ -5,7 +5,14 @@ Moves a short segment within the same route to another position,
 keeping feasibility. Objective: distance + waiting.
 """
 
+import math
+
 from core.data_structures import Route
+from core.geometry import DISTANCE_SCALE
+
+
+# Each scaled entry is off by at most 0.5 units; an or-opt delta sums 6 entries
+ROUNDING_SLACK = 3
 
 
 def or_opt_inplace(route: Route, max_segment_len: int = 3) -> bool:
@@ -23,43 +30,71 @@ def or_opt_inplace(route: Route, max_segment_len: int = 3) -> bool:
     if n < 3:
         return False
 
-    route.calculate_cost_inplace()
+    # total_cost is exactly distance + waiting
+    base_obj = route.calculate_cost_inplace()
     base_dist = route.get_total_distance()
-    base_wait = route.get_waiting_time()
-    base_obj = base_dist + base_wait
+
+    # Waiting before the first changed position is untouched by a move
+    wait_prefix = route.get_waiting_prefix()
+    base_wait = wait_prefix[-1]
+
+    # Integer budget: a move can only improve if its extra distance is
+    # smaller than the waiting it could remove
+    wait_budget = math.ceil(base_wait * DISTANCE_SCALE)
+    ids = route.customer_ids
+    dm = route.dist_matrix
+    sdm = route.scaled_dist_matrix
+    depot_id = route.depot.id
 
     # Try segment lengths 1..max_segment_len
     for seg_len in range(1, min(max_segment_len, n) + 1):
         for start in range(0, n - seg_len + 1):
             end = start + seg_len  # exclusive
-            segment = route.customer_ids[start:end]
-
-            # Remove segment
-            removed = route.customer_ids[start:end]
-            del route.customer_ids[start:end]
-
-            for insert_pos in range(0, len(route.customer_ids) + 1):
+            first_id = ids[start]
+            last_id = ids[end - 1]
+            prev_id = ids[start - 1] if start > 0 else depot_id
+            next_id = ids[end] if end < n else depot_id
+            removal_delta = (sdm[prev_id][next_id]
+                             - sdm[prev_id][first_id] - sdm[last_id][next_id])
+
+            # Remove segment (kept out for the whole insert_pos scan)
+            segment = ids[start:end]
+            del ids[start:end]
+            remaining = n - seg_len
+
+            for insert_pos in range(0, remaining + 1):
                 # Skip no-op positions (same place)
                 if insert_pos == start:
                     continue
-                # Insert segment
-                route.customer_ids[insert_pos:insert_pos] = segment
 
-                # Recompute schedule/cost and check feasibility
-                route.calculate_cost_inplace()
-                if route.is_feasible():
-                    new_obj = route.get_total_distance() + route.get_waiting_time()
+                a_id = ids[insert_pos - 1] if insert_pos > 0 else depot_id
+                b_id = ids[insert_pos] if insert_pos < remaining else depot_id
+                delta = (removal_delta + sdm[a_id][first_id] + sdm[last_id][b_id]
+                         - sdm[a_id][b_id])
+                if delta - ROUNDING_SLACK >= wait_budget:
+                    continue
+
+                # Insert segment
+                ids[insert_pos:insert_pos] = segment
+
+                # Positions before the first change keep their stored
+                # arrivals; validate and price only the rest
+                changed_from = min(start, insert_pos)
+                suffix_wait = route.evaluate_suffix(changed_from)
+                if suffix_wait is not None:
+                    new_dist = base_dist + (dm[prev_id][next_id] - dm[prev_id][first_id]
+                                            - dm[last_id][next_id] + dm[a_id][first_id]
+                                            + dm[last_id][b_id] - dm[a_id][b_id])
+                    new_obj = new_dist + wait_prefix[changed_from] + suffix_wait
                     if new_obj < base_obj - 1e-6:
+                        # Commit schedule/cost for the accepted move
+                        route.calculate_cost_inplace()
                         return True
 
                 # Rollback insert
-                del route.customer_ids[insert_pos:insert_pos + seg_len]
-                route.customer_ids[start:start] = removed
-                route.calculate_cost_inplace()
+                del ids[insert_pos:insert_pos + seg_len]
 
-            # Ensure route restored for next start
-            # (already restored in rollback loop)
+            # Restore segment at its original position for the next start
+            ids[start:start] = segment
 
     return False
-
-
@@ -3,17 +3,23 @@ Relocate Operator - In-place customer relocation
 Memory: O(1) - array splice operation
 """
 
+from itertools import permutations
 from typing import Optional, List
 from core.data_structures import Route
 
 
 def relocate_operator_inplace(route: Route,
                               temp_arrival_buffer: Optional[List[float]] = None,
-                              max_relocations: int = 50) -> bool:
+                              max_relocations: int = 50,
+                              first_improvement: bool = True) -> bool:
     """
     Try relocating customers to different positions in same route
     
     Uses early termination to limit computation
+    first_improvement returns on the first accepted move (the MDS loop
+    calls again anyway); False keeps applying moves until the budget ends
+    Each move is priced from its arc delta plus a suffix schedule check
+    (Route.evaluate_suffix); the route is only recomputed for promising moves
     Modifies route IN PLACE
     Returns True if improvement was made
     
@@ -23,33 +29,74 @@ def relocate_operator_inplace(route: Route,
         return False
     
     original_cost = route.total_cost
+    base_distance = route.get_total_distance()
+    wait_prefix = route.get_waiting_prefix()
     improved = False
     relocation_count = 0
     
-    # Try relocating each customer to each position
-    for from_pos in range(len(route.customer_ids)):
+    # Relocation keeps the route length; bind the hot names once
+    ids = route.customer_ids
+    n = len(ids)
+    dm = route.dist_matrix
+    depot_id = route.depot.id
+    evaluate_suffix = route.evaluate_suffix
+    # Exact confirmations write here; a rejected one restores the savepoint
+    # instead of recomputing the original schedule
+    spare_arrivals = [0.0] * n
+    
+    # Try relocating each customer to each other position (flattened so
+    # the budget is checked once per move)
+    for from_pos, to_pos in permutations(range(n), 2):
         if relocation_count >= max_relocations:
             break
+        relocation_count += 1
+        
+        # Arc delta: unlink from from_pos, link so it ends up at to_pos
+        cust_id = ids[from_pos]
+        prev_id = ids[from_pos - 1] if from_pos > 0 else depot_id
+        next_id = ids[from_pos + 1] if from_pos + 1 < n else depot_id
+        # Neighbours at the destination, in the list without cust_id
+        if to_pos < from_pos:
+            a_id = ids[to_pos - 1] if to_pos > 0 else depot_id
+            b_id = ids[to_pos]
+        else:
+            a_id = ids[to_pos]
+            b_id = ids[to_pos + 1] if to_pos + 1 < n else depot_id
+        delta = (dm[prev_id][next_id] - dm[prev_id][cust_id] - dm[cust_id][next_id]
+                 + dm[a_id][cust_id] + dm[cust_id][b_id] - dm[a_id][b_id])
+        
+        # Cost = distance + waiting >= new distance: prune before mutating
+        if base_distance + delta >= original_cost + 1e-6:
+            continue
         
-        for to_pos in range(len(route.customer_ids)):
-            if from_pos == to_pos:
+        # Tentative move, validated/priced from the first changed position
+        ids.insert(to_pos, ids.pop(from_pos))
+        changed_from = min(from_pos, to_pos)
+        suffix_wait = evaluate_suffix(changed_from)
+        if (suffix_wait is not None
+                and base_distance + delta + wait_prefix[changed_from] + suffix_wait
+                < original_cost + 1e-6):
+            # Promising: confirm with the exact route cost
+            saved = route.savepoint()
+            route.arrival_times = spare_arrivals
+            if route.calculate_cost_inplace() < original_cost:
+                # Improvement found; the old schedule becomes the spare
+                spare_arrivals = saved[1]
+                original_cost = route.total_cost
+                base_distance = route.get_total_distance()
+                wait_prefix = route.get_waiting_prefix()
+                improved = True
+                if first_improvement:
+                    return True
+                # Continue searching from this improved state
                 continue
-            
-            if relocation_count >= max_relocations:
-                break
-            
-            # Try relocation
-            if route.relocate_inplace(from_pos, to_pos):
-                if route.total_cost < original_cost:
-                    # Improvement found
-                    original_cost = route.total_cost
-                    improved = True
-                    # Continue searching from this improved state
-                else:
-                    # No improvement, revert
-                    route.relocate_inplace(to_pos, from_pos)  # Relocate back
-            
-            relocation_count += 1
+            # Not improving after all: revert ids, restore the schedule
+            ids.insert(from_pos, ids.pop(to_pos))
+            route.restore(saved)
+            continue
+        
+        # Infeasible or clearly not improving: revert (state untouched)
+        ids.insert(from_pos, ids.pop(to_pos))
     
     return improved
 
@@ -57,26 +104,64 @@ def relocate_operator_inplace(route: Route,
 def best_relocate_inplace(route: Route) -> bool:
     """
     Find best relocation in route (exhaustive but still in-place)
+    
+    Candidates are screened like relocate_operator_inplace (arc delta plus
+    a suffix schedule check) and rolled back by a pure id-list undo; only
+    promising ones pay for an exact cost sweep
     """
     if len(route.customer_ids) < 2:
         return False
     
     original_cost = route.total_cost
+    base_distance = route.get_total_distance()
+    wait_prefix = route.get_waiting_prefix()
     best_from, best_to = None, None
     best_cost = original_cost
     
+    ids = route.customer_ids
+    n = len(ids)
+    dm = route.dist_matrix
+    depot_id = route.depot.id
+    spare_arrivals = [0.0] * n
+    
     # Try all relocations
-    for from_pos in range(len(route.customer_ids)):
-        for to_pos in range(len(route.customer_ids)):
-            if from_pos == to_pos:
-                continue
-            
-            if route.relocate_inplace(from_pos, to_pos):
-                if route.total_cost < best_cost:
-                    best_cost = route.total_cost
-                    best_from, best_to = from_pos, to_pos
-                # Revert
-                route.relocate_inplace(to_pos, from_pos)
+    for from_pos, to_pos in permutations(range(n), 2):
+        cust_id = ids[from_pos]
+        prev_id = ids[from_pos - 1] if from_pos > 0 else depot_id
+        next_id = ids[from_pos + 1] if from_pos + 1 < n else depot_id
+        if to_pos < from_pos:
+            a_id = ids[to_pos - 1] if to_pos > 0 else depot_id
+            b_id = ids[to_pos]
+        else:
+            a_id = ids[to_pos]
+            b_id = ids[to_pos + 1] if to_pos + 1 < n else depot_id
+        new_distance = base_distance + (
+            dm[prev_id][next_id] - dm[prev_id][cust_id] - dm[cust_id][next_id]
+            + dm[a_id][cust_id] + dm[cust_id][b_id] - dm[a_id][b_id])
+        
+        # Cost = distance + waiting >= new distance
+        if new_distance >= best_cost + 1e-6:
+            continue
+        
+        ids.insert(to_pos, ids.pop(from_pos))
+        changed_from = min(from_pos, to_pos)
+        suffix_wait = route.evaluate_suffix(changed_from)
+        if (suffix_wait is not None
+                and new_distance + wait_prefix[changed_from] + suffix_wait < best_cost + 1e-6):
+            # Promising: rank by the exact route cost, computed into the
+            # spare list so the savepoint undoes it without a second sweep
+            saved = route.savepoint()
+            route.arrival_times = spare_arrivals
+            cost = route.calculate_cost_inplace()
+            ids.insert(from_pos, ids.pop(to_pos))
+            route.restore(saved)
+            if cost < best_cost:
+                best_cost = cost
+                best_from, best_to = from_pos, to_pos
+            continue
+        
+        # Revert (schedule was never touched)
+        ids.insert(from_pos, ids.pop(to_pos))
     
     # Apply best relocation if found
     if best_from is not None and best_cost < original_cost:
@@ -84,10 +169,3 @@ def best_relocate_inplace(route: Route) -> bool:
         return True
     
     return False
-
-
-
-
-
-
-
@@ -3,17 +3,23 @@ Intra-Route Swap Operator - In-place customer swap
 Memory: O(1) - swap indices in place
 """
 
+from itertools import combinations
 from typing import Optional, List
 from core.data_structures import Route
 
 
 def swap_operator_inplace(route: Route,
                          temp_arrival_buffer: Optional[List[float]] = None,
-                         max_swaps: int = 50) -> bool:
+                         max_swaps: int = 50,
+                         first_improvement: bool = True) -> bool:
     """
     Try swapping pairs of customers within same route
     
     Uses early termination to limit computation
+    first_improvement returns on the first accepted move (the MDS loop
+    calls again anyway); False keeps applying moves until the budget ends
+    Swaps whose distance delta alone rules out an improvement are skipped
+    without touching the route
     Modifies route IN PLACE
     Returns True if improvement was made
     
@@ -23,31 +29,58 @@ def swap_operator_inplace(route: Route,
         return False
     
     original_cost = route.total_cost
+    base_distance = route.get_total_distance()
+    wait_prefix = route.get_waiting_prefix()
     improved = False
     swap_count = 0
     
-    # Try swapping pairs (with early termination)
-    for i in range(len(route.customer_ids)):
+    # Swaps keep the route length; bind the hot methods once
+    ids = route.customer_ids
+    n = len(ids)
+    swap_delta = route.get_swap_distance_delta
+    evaluate_suffix = route.evaluate_suffix
+    # Exact confirmations write here; a rejected one restores the savepoint
+    # instead of recomputing the original schedule
+    spare_arrivals = [0.0] * n
+    
+    # Try swapping pairs (i < j, flattened so the budget is checked once per pair)
+    for i, j in combinations(range(n), 2):
         if swap_count >= max_swaps:
             break
+        swap_count += 1
         
-        for j in range(i + 1, len(route.customer_ids)):
-            if swap_count >= max_swaps:
-                break
-            
-            # Try swap
-            if route.swap_inplace(i, j):
-                if route.total_cost < original_cost:
-                    # Improvement found
-                    original_cost = route.total_cost
-                    improved = True
-                    # Continue searching from this improved state
-                else:
-                    # No improvement, revert
-                    route.swap_inplace(i, j)  # Swap back
-            
-            swap_count += 1
-    
+        # Cost = distance + waiting >= new distance: prune before mutating
+        delta = swap_delta(i, j)
+        if base_distance + delta >= original_cost + 1e-6:
+            continue
+        
+        # Tentative swap, validated/priced from position i only
+        ids[i], ids[j] = ids[j], ids[i]
+        suffix_wait = evaluate_suffix(i)
+        if (suffix_wait is not None
+                and base_distance + delta + wait_prefix[i] + suffix_wait < original_cost + 1e-6):
+            # Promising: confirm with the exact route cost
+            saved = route.savepoint()
+            route.arrival_times = spare_arrivals
+            if route.calculate_cost_inplace() < original_cost:
+                # Improvement found; the old schedule becomes the spare
+                spare_arrivals = saved[1]
+                original_cost = route.total_cost
+                base_distance = route.get_total_distance()
+                wait_prefix = route.get_waiting_prefix()
+                improved = True
+                if first_improvement:
+                    return True
+                # Continue searching from this improved state
+                continue
+            # Not improving after all: revert ids, restore the schedule
+            ids[i], ids[j] = ids[j], ids[i]
+            route.restore(saved)
+            continue
+        
+        # Infeasible or clearly not improving: revert (state untouched)
+        ids[i], ids[j] = ids[j], ids[i]
+
     return improved
 
 
@@ -59,12 +92,15 @@ def best_swap_inplace(route: Route) -> bool:
         return False
     
     original_cost = route.total_cost
+    base_distance = route.get_total_distance()
     best_i, best_j = None, None
     best_cost = original_cost
     
     # Try all pairs
     for i in range(len(route.customer_ids)):
         for j in range(i + 1, len(route.customer_ids)):
+            if base_distance + route.get_swap_distance_delta(i, j) >= best_cost + 1e-6:
+                continue
             if route.swap_inplace(i, j):
                 if route.total_cost < best_cost:
                     best_cost = route.total_cost
@@ -32,8 +32,7 @@ def temporal_shift_operator_inplace(route: Route,
     # Find earliest feasible departure time
     # This is the time that makes first customer arrive exactly at ready_time
     first_customer = route.get_customer(0)
-    from core.data_structures import distance
-    travel_time = distance(route.depot, first_customer)
+    travel_time = route.dist_matrix[route.depot.id][first_customer.id]
     
     earliest_departure = first_customer.ready_time - travel_time
     earliest_departure = max(0.0, earliest_departure)  # Can't depart before time 0
@@ -50,9 +49,15 @@ def temporal_shift_operator_inplace(route: Route,
     best_departure = original_departure
     best_cost = original_cost
     
+    # Identical departures give identical schedules: the current one can
+    # never be strictly better than itself, and when the route already
+    # leaves at earliest_departure the midpoint repeats it too
+    tried = {original_departure}
+    
     for candidate_departure in candidates:
-        if candidate_departure < 0:
+        if candidate_departure < 0 or candidate_departure in tried:
             continue
+        tried.add(candidate_departure)
         
         # Try this departure time
         if route.adjust_departure_time_inplace(candidate_departure):
@@ -83,8 +88,7 @@ def optimize_departure_time(route: Route) -> bool:
     
     # Find bounds
     first_customer = route.get_customer(0)
-    from core.data_structures import distance
-    travel_time = distance(route.depot, first_customer)
+    travel_time = route.dist_matrix[route.depot.id][first_customer.id]
     
     earliest = max(0.0, first_customer.ready_time - travel_time)
     latest = original_departure + 50.0  # Reasonable upper bound
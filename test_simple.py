@@ -3,11 +3,19 @@ Simple test script to verify VRPTW solver works
 Creates a small test instance without requiring Solomon file
 """
 
+from itertools import combinations, permutations
 import math
-from core.data_structures import Customer, Solution, Route, distance
+import os
+import sys
+from core.data_structures import (Customer, Solution, Route, distance,
+                                  build_customer_arrays)
+from core.geometry import build_distance_matrix, scale_distance_matrix
 from algorithms.mih import limited_candidate_mih
 from algorithms.mds import selective_mds
 from algorithms.hybrid_solver import solve_vrptw
+from operators.lns_destroy_repair import lns_destroy_repair
+from operators.relocate import relocate_operator_inplace
+from operators.swap import swap_operator_inplace
 
 
 def create_test_instance():
@@ -43,6 +51,40 @@ def create_test_instance():
     return depot, customers, vehicle_capacity
 
 
+def create_loose_route(order=range(1, 9)):
+    """
+    One route over 8 customers (visited in the given order) with wide time
+    windows, so most reorderings stay feasible; customer 7 opens late, so
+    the vehicle waits there and its arrival often comes out unchanged
+    after an edit
+    """
+    depot = Customer(id=0, x=0.0, y=0.0, demand=0,
+                     ready_time=0, due_date=1000, service_time=0)
+    customers = [
+        Customer(id=i, x=(i % 4) * 10.0, y=(i // 4) * 10.0, demand=5,
+                 ready_time=200 if i == 7 else 0, due_date=1000, service_time=5)
+        for i in range(1, 9)
+    ]
+    lookup = {c.id: c for c in customers}
+    dist_matrix = build_distance_matrix(depot, customers)
+    route = Route(depot, 50, lookup, dist_matrix,
+                  scale_distance_matrix(dist_matrix),
+                  build_customer_arrays(depot, customers))
+    for pos, cid in enumerate(order):
+        assert route.insert_inplace(cid, pos)
+    return route
+
+
+def assert_served_once_and_feasible(solution, customers):
+    """Every customer on exactly one route, every route within its windows"""
+    served = [cid for route in solution.routes for cid in route.customer_ids]
+    assert sorted(served) == sorted(c.id for c in customers)
+    for route in solution.routes:
+        assert route.is_feasible()
+        # Re-propagate from the depot instead of trusting stored arrivals
+        assert route.evaluate_suffix(0) is not None
+
+
 def test_basic_functionality():
     """Test basic solver functionality"""
     print("Creating test instance...")
@@ -75,6 +117,191 @@ def test_basic_functionality():
     print("\n[OK] All tests passed!")
 
 
+def test_evaluate_suffix_settle_matches_full_pass():
+    """Early exit on a settled arrival gives the same result as a full pass"""
+    route = create_loose_route()
+    ids = route.customer_ids
+    n = len(ids)
+    wait_prefix = route.get_waiting_prefix()
+    # Only the early return reads the prefix, so a NaN prefix marks it
+    nan_prefix = [float('nan')] * len(wait_prefix)
+    
+    settled = 0
+    for i in range(n - 1):
+        for j in range(i + 1, n):
+            # Reverse [i, j] as 2-opt does; stops after j keep their index
+            ids[i:j + 1] = ids[i:j + 1][::-1]
+            fast = route.evaluate_suffix(i, j + 1, wait_prefix)
+            probe = route.evaluate_suffix(i, j + 1, nan_prefix)
+            full = route.evaluate_suffix(i)
+            ids[i:j + 1] = ids[i:j + 1][::-1]
+            
+            assert (fast is None) == (full is None)
+            if full is not None:
+                assert math.isclose(fast, full, abs_tol=1e-9)
+                if math.isnan(probe):
+                    settled += 1
+    # Customer 7 opens late, so several reversals settle there early
+    assert settled > 0
+
+
+def test_relocate_inplace_final_index():
+    """relocate_inplace(from_pos, to_pos) leaves the customer at to_pos"""
+    route = create_loose_route()
+    original_ids = list(route.customer_ids)
+    original_cost = route.total_cost
+    
+    for from_pos, to_pos in [(1, 5), (6, 2)]:  # forward, then backward
+        cid = route.customer_ids[from_pos]
+        assert route.relocate_inplace(from_pos, to_pos)
+        assert route.customer_ids[to_pos] == cid
+        assert sorted(route.customer_ids) == sorted(original_ids)
+        
+        # Moving it back restores the original order and cost
+        assert route.relocate_inplace(to_pos, from_pos)
+        assert route.customer_ids == original_ids
+        assert math.isclose(route.total_cost, original_cost, abs_tol=1e-9)
+
+
+def test_lns_best_insertion_repair():
+    """LNS with repair="best" keeps every customer and stays feasible"""
+    depot, customers, vehicle_capacity = create_test_instance()
+    solution = limited_candidate_mih(depot, customers, vehicle_capacity,
+                                     random_seed=42)
+    for seed in range(5):
+        lns_destroy_repair(solution, removal_fraction=0.5,
+                           random_seed=seed, repair="best")
+        assert_served_once_and_feasible(solution, customers)
+    
+    solution = solve_vrptw(depot, customers, vehicle_capacity,
+                           random_seed=42, repair="best")
+    assert_served_once_and_feasible(solution, customers)
+
+
+def test_lns_regret_repair():
+    """LNS with repair="regret" keeps every customer for any k"""
+    depot, customers, vehicle_capacity = create_test_instance()
+    for k in (2, 3, 4):
+        solution = limited_candidate_mih(depot, customers, vehicle_capacity,
+                                         random_seed=42)
+        for seed in range(5):
+            lns_destroy_repair(solution, removal_fraction=0.5, random_seed=seed,
+                               repair="regret", regret_k=k)
+            assert_served_once_and_feasible(solution, customers)
+    
+    solution = solve_vrptw(depot, customers, vehicle_capacity, random_seed=42,
+                           repair="regret", regret_k=2)
+    assert_served_once_and_feasible(solution, customers)
+
+
+def test_lns_keeps_customers_when_everything_is_destroyed():
+    """Destroying every customer, or failing repair, never loses customers"""
+    depot, customers, vehicle_capacity = create_test_instance()
+    for repair in ("first_fit", "best", "regret"):
+        solution = limited_candidate_mih(depot, customers, vehicle_capacity,
+                                         random_seed=42)
+        lns_destroy_repair(solution, removal_fraction=1.0,
+                           fixed_remove_count=len(customers), repair=repair)
+        assert_served_once_and_feasible(solution, customers)
+        
+        # Customer 4 can't be served at all while its window is closed, so
+        # repair fails and the pre-destroy solution must come back as it was
+        solution = limited_candidate_mih(depot, customers, vehicle_capacity,
+                                         random_seed=42)
+        before = [(list(r.customer_ids), r.total_cost) for r in solution.routes]
+        due = solution.routes[0].customer_arrays.due_date
+        saved_due = due[4]
+        due[4] = -1
+        try:
+            improved = lns_destroy_repair(solution, removal_fraction=1.0,
+                                          fixed_remove_count=len(customers),
+                                          repair=repair)
+        finally:
+            due[4] = saved_due
+        assert not improved
+        assert [(r.customer_ids, r.total_cost) for r in solution.routes] == before
+        assert_served_once_and_feasible(solution, customers)
+
+
+def test_granular_inter_route_search():
+    """neighbor_count restricts inter-route moves but keeps a valid solution"""
+    depot, customers, vehicle_capacity = create_test_instance()
+    for k in (1, 5):
+        solution = solve_vrptw(depot, customers, vehicle_capacity,
+                               random_seed=42, neighbor_count=k)
+        assert_served_once_and_feasible(solution, customers)
+
+
+def test_main_rejects_bad_neighbor_count():
+    """VRPTW_NEIGHBORS must be a positive integer"""
+    import main
+    
+    instance_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'data', 'c101.txt')
+    saved_argv = sys.argv
+    saved_neighbors = os.environ.get('VRPTW_NEIGHBORS')
+    try:
+        sys.argv = ['main.py', instance_file, '10']
+        for value in ('0', '-3', 'abc', '2.5'):
+            os.environ['VRPTW_NEIGHBORS'] = value
+            try:
+                main.main()
+            except SystemExit as e:
+                assert e.code == 1
+            else:
+                raise AssertionError(f"VRPTW_NEIGHBORS={value!r} was accepted")
+    finally:
+        sys.argv = saved_argv
+        if saved_neighbors is None:
+            os.environ.pop('VRPTW_NEIGHBORS', None)
+        else:
+            os.environ['VRPTW_NEIGHBORS'] = saved_neighbors
+
+
+def apply_improving_moves(route, moves, move, budget):
+    """
+    Reference for the non-first-improvement operators: try each move in
+    order within the budget, keep it if it lowers the cost, undo otherwise
+    Returns the number of moves kept
+    """
+    kept = 0
+    for a, b in list(moves)[:budget]:
+        cost = route.total_cost
+        if move(a, b):
+            if route.total_cost < cost:
+                kept += 1
+            else:
+                move(b, a)
+    return kept
+
+
+def test_swap_and_relocate_keep_improving_until_budget():
+    """first_improvement=False applies every improving move in the budget"""
+    # Scrambled visiting order: every budget below holds several
+    # improving moves for both operators
+    order = [7, 2, 5, 6, 4, 1, 3, 8]
+    for budget in (10, 28, 56):
+        route = create_loose_route(order)
+        expected = create_loose_route(order)
+        kept = apply_improving_moves(expected, combinations(range(8), 2),
+                                     expected.swap_inplace, budget)
+        assert kept > 1
+        assert swap_operator_inplace(route, max_swaps=budget,
+                                     first_improvement=False)
+        assert route.customer_ids == expected.customer_ids
+        assert math.isclose(route.total_cost, expected.total_cost, abs_tol=1e-9)
+        
+        route = create_loose_route(order)
+        expected = create_loose_route(order)
+        kept = apply_improving_moves(expected, permutations(range(8), 2),
+                                     expected.relocate_inplace, budget)
+        assert kept > 1
+        assert relocate_operator_inplace(route, max_relocations=budget,
+                                         first_improvement=False)
+        assert route.customer_ids == expected.customer_ids
+        assert math.isclose(route.total_cost, expected.total_cost, abs_tol=1e-9)
+
+
 if __name__ == "__main__":
     try:
         test_basic_functionality()